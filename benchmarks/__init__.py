@@ -0,0 +1 @@
+# Performance benchmarks; run from the repo root, e.g. python -m benchmarks.bench_writers
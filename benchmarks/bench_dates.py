@@ -0,0 +1,56 @@
+"""
+Compare pandas' inferred date parsing with dates.parse_dates on DMS-style date strings.
+
+    python -m benchmarks.bench_dates --rows 500000
+"""
+import argparse
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from dates import parse_dates
+
+def synthetic_dates(rows, days=120, seed=0):
+    # PO DATE / ORDER DATE as exported: dd-mm-yyyy over the last `days` days, with a few
+    # 2-digit years, ISO timestamps and blanks mixed in
+    rng = np.random.default_rng(seed)
+    stamps = pd.Timestamp("2026-10-15") - pd.to_timedelta(rng.integers(0, days, rows), unit="D")
+    values = stamps.strftime("%d-%m-%Y").to_numpy(dtype=object)
+    pick = rng.random(rows)
+    values[pick < 0.02] = stamps[pick < 0.02].strftime("%d-%m-%y")
+    values[(pick >= 0.02) & (pick < 0.03)] = stamps[(pick >= 0.02) & (pick < 0.03)].strftime("%Y-%m-%d %H:%M:%S")
+    values[(pick >= 0.03) & (pick < 0.04)] = None
+    return pd.Series(values, dtype=object), pd.Series(stamps.normalize())
+
+def run(rows, days):
+    values, expected = synthetic_dates(rows, days)
+    candidates = [
+        ("pd.to_datetime (inferred)", lambda: pd.to_datetime(values, errors="coerce")),
+        ("pd.to_datetime (format='mixed')", lambda: pd.to_datetime(values, format="mixed", dayfirst=True,
+                                                                    errors="coerce")),
+        ("parse_dates (detect)", lambda: parse_dates(values)),
+        ("parse_dates (cached format)", lambda: parse_dates(values, "bench", formats)),
+    ]
+    formats = {}
+    parse_dates(values.head(1000), "bench", formats)  # format remembered, as for the 2nd file of a kind
+    results = []
+    for name, parse in candidates:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            t0 = time.perf_counter()
+            parsed = parse()
+            elapsed = time.perf_counter() - t0
+        correct = (parsed.dt.normalize() == expected) & values.notna()
+        results.append({"parser": name, "rows": rows, "seconds": round(elapsed, 3),
+                        "parsed": int(parsed.notna().sum()), "correct": int(correct.sum())})
+    return pd.DataFrame(results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--days", type=int, default=120, help="distinct dates in the column")
+    args = parser.parse_args()
+    print(run(args.rows, args.days).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Time the whole upload pipeline on a synthetic upload and compare it with a saved baseline.
+
+    python -m benchmarks.bench_pipeline --locations 12 --rows 3000 --save-baseline
+    python -m benchmarks.bench_pipeline --locations 12 --rows 3000
+
+Steps: extract (ZIP to folders), check_presence, validate_cross_sums, validate_periods,
+process_files (the report generation behind it, without the Streamlit output) and
+dealer_zip (Combined_Dealerwise_Reports.zip). Each run starts from a fresh extraction
+and an empty FrameStore without parse cache; the best of --repeat runs is kept.
+A step slower than the baseline by more than --tolerance (and --min-seconds) is
+flagged and the exit status is 1. Baselines are machine specific, so they are only
+compared when the upload settings match and are not committed.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+import pandas as pd
+from benchmarks.synthetic import make_upload
+from frame_store import FrameStore
+from hrpt import generate_reports, build_dealer_zip
+from validation import extract_upload, check_presence, validate_cross_sums, validate_periods
+from writers import WRITER_BACKENDS, DEFAULT_BACKEND, OUTPUT_FORMATS, DEFAULT_FORMAT
+from timings import stage_summary
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STEPS = ("extract", "check_presence", "validate_cross_sums", "validate_periods", "process_files", "dealer_zip")
+
+def run_once(zip_path, workers=1, xlsx_backend=None, period_days=1, output_format=None):
+    """{step: seconds} of one cold run, and the run's FrameStore (for its per-stage timings)."""
+    end_date = datetime.today().date()
+    start_date = end_date - timedelta(days=59)
+    temp_dir = tempfile.mkdtemp()
+    seconds = {}
+
+    def timed(step, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        seconds[step] = time.perf_counter() - t0
+        return result
+
+    try:
+        _, all_locations = timed("extract", extract_upload, zip_path, temp_dir)
+        store = FrameStore()
+        timed("check_presence", check_presence, all_locations, store)
+        timed("validate_cross_sums", validate_cross_sums, all_locations, store)
+        timed("validate_periods", validate_periods, all_locations, start_date, end_date, period_days, store)
+        reports, _ = timed("process_files", generate_reports, all_locations, len(all_locations),
+                           None, None, ["Spares"], store, workers, xlsx_backend, None, output_format)
+        timed("dealer_zip", build_dealer_zip, reports, xlsx_backend, None, None, store.timings)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return seconds, store
+
+def run(config, repeat=3, workers=1, xlsx_backend=None, output_format=None):
+    """Best seconds per step over `repeat` cold runs, and the last run's FrameStore."""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        zip_path = os.path.join(temp_dir, "upload.zip")
+        make_upload(zip_path, **config)
+        best = {}
+        for _ in range(repeat):
+            seconds, store = run_once(zip_path, workers, xlsx_backend, output_format=output_format)
+            for step, value in seconds.items():
+                best[step] = min(best.get(step, value), value)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    best["total"] = sum(best[step] for step in STEPS)
+    return best, store
+
+def compare(seconds, baseline, tolerance=0.25, min_seconds=0.05):
+    """Per-step table against the baseline; regression = slower by > tolerance and > min_seconds."""
+    rows = []
+    for step, value in seconds.items():
+        base = baseline.get(step)
+        change = (value / base - 1) if base else None
+        regression = base is not None and value - base > min_seconds and value > base * (1 + tolerance)
+        rows.append({"step": step, "seconds": round(value, 3),
+                     "baseline": round(base, 3) if base is not None else None,
+                     "change": f"{change:+.0%}" if change is not None else "",
+                     "status": "REGRESSION" if regression else ""})
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--locations", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=3000, help="rows per BO LIST / Detail / Stock file")
+    parser.add_argument("--dealers", type=int, default=4)
+    parser.add_argument("--days", type=int, default=120, help="date spread, days back from today")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--xlsx-only", action="store_true", help="real .xlsx instead of HTML-disguised .xls")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--xlsx-backend", choices=WRITER_BACKENDS, default=DEFAULT_BACKEND)
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=DEFAULT_FORMAT)
+    parser.add_argument("--repeat", type=int, default=3, help="cold runs; the fastest per step is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--stages", action="store_true", help="also print the per-stage timings of the last run")
+    args = parser.parse_args()
+
+    config = dict(locations=args.locations, rows=args.rows, dealers=args.dealers, days=args.days,
+                  seed=args.seed, html_xls=not args.xlsx_only)
+    settings = dict(config, workers=args.workers, xlsx_backend=args.xlsx_backend, output_format=args.output_format)
+    seconds, store = run(config, args.repeat, args.workers, args.xlsx_backend, args.output_format)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            saved = json.load(fh)
+        if saved.get("settings") == settings:
+            baseline = saved["seconds"]
+        else:
+            print(f"{args.baseline}: recorded with other settings {saved.get('settings')}, not compared")
+
+    table = compare(seconds, baseline, args.tolerance, args.min_seconds)
+    print(table.to_string(index=False))
+    if args.stages:
+        print()
+        print(stage_summary(store.timings.frame()).to_string(index=False))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump({"settings": settings, "seconds": seconds}, fh, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    return 1 if (table["status"] == "REGRESSION").any() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
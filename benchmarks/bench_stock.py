@@ -0,0 +1,68 @@
+"""
+Peak memory and time of building the Stock output from one large Stock export: the whole
+file parsed then filtered (old) vs FrameStore.reduce reading it in chunks.
+
+    python -m benchmarks.bench_stock --rows 300000 --chunk-rows 50000
+"""
+import io
+import os
+import argparse
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from frame_store import FrameStore, read_file
+from schemas import apply_schema, text_columns
+from hrpt import stock_rows
+from benchmarks.bench_text import synthetic_stock_csv
+
+def old_stock(path, select_categories):
+    df = read_file(path, header=0, text_cols=text_columns("stock"))
+    return stock_rows(apply_schema(df, "stock"), select_categories)
+
+def new_stock(path, select_categories, chunk_rows):
+    location_path, file = os.path.split(path)
+    store = FrameStore(index={location_path: {"stock": [file]}})
+    (_, df), = store.reduce(location_path, "stock", lambda d: stock_rows(d, select_categories), chunk_rows)
+    return df
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    df = fn(*args)
+    seconds = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, seconds, peak
+
+def run(rows, chunk_rows, formats=("csv", "xlsx"), select_categories=("Spares",)):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            path = os.path.join(tmp, f"Stock 1.{fmt}")
+            data = synthetic_stock_csv(rows)
+            if fmt == "csv":
+                with open(path, "wb") as fh:
+                    fh.write(data)
+            else:
+                pd.read_csv(io.BytesIO(data)).to_excel(path, index=False)
+            frames = {}
+            for name, fn, args in (("whole file (old)", old_stock, (path, list(select_categories))),
+                                   ("chunked", new_stock, (path, list(select_categories), chunk_rows))):
+                frames[name], seconds, peak = measure(fn, *args)
+                results.append({"file": fmt, "rows": rows, "reader": name, "seconds": round(seconds, 2),
+                                "peak_mb": round(peak / 2**20, 1)})
+            results[-1]["same"] = frames["chunked"].reset_index(drop=True).equals(
+                frames["whole file (old)"].reset_index(drop=True))
+    return pd.DataFrame(results).fillna("")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--chunk-rows", type=int, default=100000)
+    parser.add_argument("--formats", default="csv,xlsx")
+    args = parser.parse_args()
+    print(run(args.rows, args.chunk_rows, args.formats.split(",")).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
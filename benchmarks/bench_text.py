@@ -0,0 +1,57 @@
+"""
+Compare the old CSV fallback (Python engine, sep=None, re-read as windows-1252 on a
+decode error) with frame_store.read_text on large Stock CSV exports.
+
+    python -m benchmarks.bench_text --rows 500000
+"""
+import io
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from frame_store import read_text
+
+def synthetic_stock_csv(rows, sep=",", encoding="utf-8", seed=0):
+    # Stock export columns; windows-1252 files carry accented descriptions near the end,
+    # after the part of the file the old reader had already parsed as UTF-8
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "PART NO ?": [f"P{a}-{b}.A" for a, b in zip(rng.integers(1000, 9999, rows), rng.integers(10, 99, rows))],
+        "PART TYPE": rng.choice(["X", "Y", "A", "Z"], rows),
+        "ON-HAND": rng.integers(0, 50, rows),
+        "LOCATION": rng.choice(["R01", "R02", "S10"], rows),
+        "DESCRIPTION": rng.choice(["FILTER, OIL", "PAD KIT", "BULB 12V"], rows),
+    })
+    if encoding != "utf-8":
+        df.loc[df.index[-10:], "DESCRIPTION"] = "PLAQUETTE DE FREIN (FREINS AVANT) É"
+    return df.to_csv(index=False, sep=sep).encode(encoding)
+
+def old_read(data):
+    try:
+        return pd.read_csv(io.BytesIO(data), header=0, sep=None, engine="python", on_bad_lines="skip",
+                           encoding="utf-8")
+    except UnicodeDecodeError:
+        return pd.read_csv(io.BytesIO(data), header=0, sep=None, engine="python", on_bad_lines="skip",
+                           encoding="windows-1252")
+
+def run(rows):
+    results = []
+    for sep, encoding in ((",", "utf-8"), (";", "utf-8"), ("\t", "windows-1252")):
+        data = synthetic_stock_csv(rows, sep, encoding)
+        frames = {}
+        for name, read in (("python engine (old)", old_read), ("read_text", lambda d: read_text(io.BytesIO(d), 0))):
+            t0 = time.perf_counter()
+            frames[name] = read(data)
+            results.append({"file": f"{sep!r} {encoding}", "reader": name, "rows": rows,
+                            "mb": round(len(data) / 2**20, 1), "seconds": round(time.perf_counter() - t0, 3)})
+        results[-1]["same"] = frames["read_text"].equals(frames["python engine (old)"])
+    return pd.DataFrame(results).fillna("")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+    print(run(args.rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
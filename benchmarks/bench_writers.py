@@ -0,0 +1,61 @@
+"""
+Compare xlsx writer backends on a large synthetic OEM report.
+
+    python -m benchmarks.bench_writers --rows 200000
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from hrpt import oem_summary
+from writers import write_workbook, available_backends
+
+def synthetic_oem(rows, seed=0):
+    # same columns/types as the OEM_{brand}_{dealer}_{location}.xlsx sheet1
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 90, rows), unit="D")
+    return pd.DataFrame({
+        "Brand": "HYUNDAI",
+        "Dealer": "DEALER",
+        "Location": rng.choice(["LOC1", "LOC2", "LOC3"], rows),
+        "OrderNumber": [f"ORD{n}" for n in rng.integers(1, 5000, rows)],
+        "PartNumber": [f"P{n}" for n in rng.integers(100000, 999999, rows)],
+        "OrderDate": dates.strftime("%d %b %Y"),
+        "POQty": rng.integers(0, 20, rows).astype(float),
+        "Remark": rng.choice(["Ok", "Pls Check", "Receiving Pending Detail.xls"], rows),
+        "OEMInvoiceNo": "",
+        "OEMInvoiceDate": "",
+        "OEMInvoiceQty": "",
+    })
+
+def run(rows, backends, memory=True):
+    df = synthetic_oem(rows)
+    sheets = [("Check Order status", oem_summary(df)), ("sheet1", df)]
+    results = []
+    for backend in backends:
+        t0 = time.perf_counter()
+        size = len(write_workbook(sheets, backend))
+        elapsed = time.perf_counter() - t0
+        peak = None
+        if memory:
+            # separate pass: tracemalloc slows the writer down
+            tracemalloc.start()
+            write_workbook(sheets, backend)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results.append({"backend": backend, "rows": rows, "seconds": round(elapsed, 2),
+                        "peak_mb": round(peak / 2**20, 1) if peak is not None else None,
+                        "xlsx_mb": round(size / 2**20, 1)})
+    return pd.DataFrame(results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--backends", nargs="*", default=available_backends())
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory pass")
+    args = parser.parse_args()
+    print(run(args.rows, args.backends, memory=not args.no_memory).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Synthetic Hyundai uploads with the DMS export layouts, for benchmarks that cannot use customer ZIPs.
+
+    python -m benchmarks.synthetic upload.zip --locations 12 --rows 3000 --days 120
+
+Every location folder (HYUNDAI/<dealer>/<location>) gets the eight reports:
+BO LIST (header row 1), Receiving Pending/Today List (header row 2, under a
+"SHIPPED INFORMATION" group row) and Detail (header row 1), Transfer List (header
+row 1), Transfer Detail ("PART NO ?" / "QUANTITY") and Stock. Receiving and
+Transfer Detail files are HTML tables saved as .xls, as the DMS exports them.
+List totals match their Detail files, so the upload passes the quantity
+reconciliation unless mismatch=True.
+"""
+import io
+import os
+import argparse
+import zipfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from schemas import BO_COLS, RPD_COLS, RPL_COLS, TL_COLS, BO_QTY_COLS
+
+try:
+    import xlsxwriter  # noqa: F401  (faster xlsx output for large files)
+    _XLSX_ENGINE = "xlsxwriter"
+except ImportError:
+    _XLSX_ENGINE = "openpyxl"
+
+def _dates(rng, n, days):
+    today = pd.Timestamp(datetime.today().date())
+    return (today - pd.to_timedelta(rng.integers(0, days + 1, n), unit="D")).strftime("%d-%m-%Y")
+
+def _parts(rng, n, suffix):
+    return [f"P{a}-{b}.{suffix}" for a, b in zip(rng.integers(1000, 9999, n), rng.integers(10, 99, n))]
+
+def _with_header_rows(df, titles):
+    # the DMS puts title rows above the header: the header lands on row len(titles)
+    width = df.shape[1]
+    top = [list(row) + [None] * (width - len(row)) for row in titles]
+    return pd.DataFrame(top + [list(df.columns)] + df.to_numpy(dtype=object).tolist())
+
+def _file_bytes(df, fmt):
+    buf = io.BytesIO()
+    if fmt == "xlsx":
+        df.to_excel(buf, index=False, header=False, engine=_XLSX_ENGINE)
+    else:  # HTML table with an .xls name
+        buf.write(df.to_html(index=False, header=False, na_rep="").encode("utf-8"))
+    return buf.getvalue()
+
+def _blank(columns, n):
+    return pd.DataFrame({c: [None] * n for c in columns})
+
+def location_files(rng, rows=200, days=120, html_xls=True, mismatch=False):
+    """{file_name: bytes} for one location."""
+    xls_fmt, xls_ext = ("html", "xls") if html_xls else ("xlsx", "xlsx")
+    files = {}
+    orders = [f"ORD{n}" for n in rng.integers(1, max(rows // 5, 2), rows)]
+    parts = _parts(rng, rows, "A")
+
+    bo = _blank(BO_COLS, rows)
+    bo["ORDER NO"] = orders
+    bo["LINE"] = np.arange(1, rows + 1)
+    bo["PART NO_ORDER"] = parts
+    bo["PART NO_CURRENT"] = parts
+    bo["QUANTITY_ORDER"] = rng.integers(1, 6, rows)
+    bo["QUANTITY_CURRENT"] = bo["QUANTITY_ORDER"]
+    for col in BO_QTY_COLS:
+        if col != "QUANTITY_CURRENT":
+            bo[col] = rng.choice([0, 0, 0, 1, 2], rows)
+    bo["PO DATE"] = _dates(rng, rows, days)
+    files["BO LIST 1.xlsx"] = _file_bytes(_with_header_rows(bo, [["BACK ORDER LIST"]]), "xlsx")
+
+    for name in ("Receiving Pending", "Receiving Today"):
+        detail = _blank(RPD_COLS, rows)
+        detail["SEQ"] = np.arange(1, rows + 1)
+        detail["ORDER NO "] = orders
+        detail["PART NO _SUPPLY"] = parts
+        detail["PART NO _ORDER"] = parts
+        detail["SUPPLY QTY"] = rng.integers(0, 10, rows)
+        detail["ACCEPT QTY"] = detail["SUPPLY QTY"]
+        detail["ORDER DATE"] = _dates(rng, rows, days)
+        files[f"{name} Detail.{xls_ext}"] = _file_bytes(_with_header_rows(detail, [[f"{name.upper()} DETAIL"]]),
+                                                        xls_fmt)
+        # one GR line per 50 detail rows; the ACCEPT column adds up to the Detail total
+        gr = max(rows // 50, 1)
+        lst = _blank(RPL_COLS, gr)
+        lst["SEQ"] = np.arange(1, gr + 1)
+        lst["GR_NO"] = [f"GR{n}" for n in range(gr)]
+        accept = np.full(gr, int(detail["ACCEPT QTY"].sum()) // gr)
+        accept[0] += int(detail["ACCEPT QTY"].sum()) - int(accept.sum()) + (1 if mismatch else 0)
+        lst["SHIPPED INFORMATION_ACCEPT QTY"] = accept
+        # two-level header: group row over the shipped-information columns, then the sub-columns
+        sub = [c.replace("SHIPPED INFORMATION_", "") for c in RPL_COLS]
+        group = ["SHIPPED INFORMATION" if c.startswith("SHIPPED INFORMATION_") else c for c in RPL_COLS]
+        lst.columns = sub
+        files[f"{name} List.{xls_ext}"] = _file_bytes(_with_header_rows(lst, [[f"{name.upper()} LIST"], group]),
+                                                      xls_fmt)
+
+    transfers = max(rows // 10, 1)
+    tl = _blank(TL_COLS, transfers)
+    tl["TRANSFER NO"] = [f"TR{n}" for n in range(transfers)]
+    tl["REQ.DATE"] = _dates(rng, transfers, days)
+    tl["QUANTITY_SEND"] = rng.integers(1, 6, transfers)
+    files["Transfer List.xlsx"] = _file_bytes(_with_header_rows(tl, [["TRANSFER LIST"]]), "xlsx")
+
+    # Transfer Detail: two lines per transfer, same total as the List
+    sent = np.repeat(tl["QUANTITY_SEND"].to_numpy(), 2)
+    td = pd.DataFrame({"TRANSFER NO": np.repeat(tl["TRANSFER NO"].to_numpy(), 2),
+                       "PART NO ?": [f" {p} " for p in _parts(rng, len(sent), "T")],
+                       "QUANTITY": np.where(np.arange(len(sent)) % 2 == 0, (sent + 1) // 2, sent // 2)})
+    files[f"Transfer Detail.{xls_ext}"] = _file_bytes(_with_header_rows(td, []), xls_fmt)
+
+    stock = pd.DataFrame({"PART NO ?": _parts(rng, rows, "B"),
+                          "PART TYPE": rng.choice(["X", "Y", "A", "Z"], rows),
+                          "ON-HAND": rng.integers(0, 50, rows),
+                          "DESCRIPTION": "PART"})
+    files["Stock 1.xlsx"] = _file_bytes(_with_header_rows(stock, []), "xlsx")
+    return files
+
+def make_upload(path, locations=3, rows=200, dealers=2, days=120, seed=0, html_xls=True, mismatch=False):
+    """
+    Write a synthetic upload ZIP to `path`; returns [(brand, dealer, location)].
+    mismatch: make every Receiving List one unit off its Detail, so the upload is blocked.
+    """
+    rng = np.random.default_rng(seed)
+    names = []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(locations):
+            brand, dealer, location = "HYUNDAI", f"DLR{i % dealers}", f"LOC{i}"
+            for file_name, blob in location_files(rng, rows, days, html_xls, mismatch).items():
+                zf.writestr(f"{brand}/{dealer}/{location}/{file_name}", blob)
+            names.append((brand, dealer, location))
+    return names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="ZIP file to write")
+    parser.add_argument("--locations", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=200, help="rows per BO LIST / Detail / Stock file")
+    parser.add_argument("--dealers", type=int, default=2)
+    parser.add_argument("--days", type=int, default=120, help="date spread, days back from today")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--xlsx-only", action="store_true", help="real .xlsx instead of HTML-disguised .xls")
+    parser.add_argument("--mismatch", action="store_true", help="break the quantity reconciliation")
+    args = parser.parse_args()
+    names = make_upload(args.path, args.locations, args.rows, args.dealers, args.days, args.seed,
+                        not args.xlsx_only, args.mismatch)
+    print(f"{args.path}: {len(names)} locations, {os.path.getsize(args.path) / 2**20:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# ---------------- Date Parsing ---------------- #
+# DMS exports carry dates as text (dd-mm-yyyy, sometimes 2-digit years or a time part).
+# pd.to_datetime without a format guesses it from the first value, month-first, so a file
+# starting with 05-10-2026 turns every later day > 12 into NaT. Here the format is detected
+# once from a sample of the column, remembered per source (report kind, column) for the
+# next file of the same upload, and the column is parsed with it; only the rows it misses
+# try other formats. The memory is the caller's dict (FrameStore.date_formats), never
+# process-wide: an ambiguous column (every day <= 12) follows its own upload's files only.
+
+# Day-first before month-first: on a sample that fits both (every day <= 12) the first wins.
+DATE_FORMATS = (
+    "%d-%m-%Y", "%d-%m-%y", "%d/%m/%Y", "%d/%m/%y", "%d.%m.%Y", "%d.%m.%y",
+    "%d-%b-%Y", "%d-%b-%y", "%d %b %Y", "%d/%b/%Y",
+    "%Y-%m-%d", "%Y/%m/%d",
+    "%d-%m-%Y %H:%M:%S", "%d/%m/%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d/%m/%Y %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%m-%d-%Y", "%m/%d/%Y", "%m-%d-%y", "%m/%d/%y",
+)
+SAMPLE_SIZE = 256
+
+def _try(values, fmt):
+    return pd.to_datetime(values, format=fmt, errors="coerce")
+
+def detect_format(sample, hint=None):
+    """The format in DATE_FORMATS (or `hint`) that parses most of `sample`; None if none does."""
+    n = len(sample)
+    if hint is not None and _try(sample, hint).notna().sum() == n:
+        return hint
+    best, best_count = None, 0
+    for fmt in DATE_FORMATS:
+        count = _try(sample, fmt).notna().sum()
+        if count > best_count:
+            best, best_count = fmt, count
+            if count == n:
+                break
+    return best
+
+def _sample(values):
+    # evenly spaced, so a late day > 12 can rule out month-first
+    if len(values) <= SAMPLE_SIZE:
+        return values
+    return values.iloc[np.linspace(0, len(values) - 1, SAMPLE_SIZE).astype(int)]
+
+def _parse_strings(values, source, formats):
+    # each distinct string is parsed once: a DMS column holds a few hundred dates at most
+    codes, uniques = pd.factorize(values)
+    parsed = _parse_unique(pd.Series(uniques, dtype=object).str.strip(), source, formats)
+    lookup = np.append(parsed.to_numpy(dtype="datetime64[us]"), np.datetime64("NaT", "us"))
+    return pd.Series(lookup[codes], index=values.index, name=values.name)  # code -1 (missing) -> NaT
+
+def _parse_unique(values, source, formats):
+    values = values.where(values != "")
+    present = values.dropna()
+    if present.empty:
+        return pd.Series(pd.NaT, index=values.index, dtype="datetime64[us]")
+    remember = formats is not None and source is not None
+    hint = formats.get(source) if remember else None
+    fmt = detect_format(_sample(present), hint)
+    if fmt is None:
+        return _parse_rest(values)
+    if remember:
+        formats[source] = fmt
+    parsed = _try(values, fmt)
+    missed = parsed.isna() & values.notna()
+    if missed.any():
+        parsed[missed] = _parse_rest(values[missed])
+    return parsed
+
+def _parse_rest(values):
+    # rows the column's format missed: every known format in turn, then value by value
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[us]")
+    todo = values.notna()
+    for fmt in DATE_FORMATS:
+        if not todo.any():
+            return parsed
+        hit = _try(values[todo], fmt).dropna()
+        parsed[hit.index] = hit
+        todo[hit.index] = False
+    if todo.any():
+        parsed[todo] = pd.to_datetime(values[todo], format="mixed", dayfirst=True, errors="coerce")
+    return parsed
+
+def parse_dates(values, source=None, formats=None):
+    """
+    Series -> datetime64 Series (unparseable = NaT). Text is parsed with the format
+    detected for the column (see detect_format). formats: {source: format} detected so
+    far for one upload, read as the hint and updated; `source` is the key, e.g. (report
+    kind, column name). Without both nothing is remembered. Datetime and numeric values
+    are converted by pd.to_datetime as they are.
+    """
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "string":
+        return _parse_strings(values.astype(object), source, formats)
+    if not kind.startswith("mixed"):
+        return pd.to_datetime(values, errors="coerce")
+    # cell-typed sources (xlsx/xls) can mix real dates and text in one column
+    is_text = values.map(lambda v: isinstance(v, str)).astype(bool)
+    parsed = pd.to_datetime(values.where(~is_text), errors="coerce")
+    parsed[is_text] = _parse_strings(values[is_text].astype(object), source, formats)
+    return parsed
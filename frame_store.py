@@ -0,0 +1,743 @@
+import io
+import os
+import re
+import csv
+import zlib
+import time
+import hashlib
+import zipfile
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from parse_cache import content_key
+from schemas import SCHEMAS, apply_schema, convert, date_columns, read_columns, text_columns
+from timings import StageTimings, location_label
+
+# ---------------- Report Kinds ---------------- #
+# kind -> (file name prefixes, header row), from the schema registry (schemas.py)
+REPORT_KINDS = {kind: (schema.prefixes, schema.header) for kind, schema in SCHEMAS.items()}
+
+def classify_file(file_name):
+    """Return the report kind for a file name, or None if it is not a known report."""
+    fl = file_name.lower().strip()
+    for kind, (prefixes, _) in REPORT_KINDS.items():
+        if fl.startswith(prefixes):
+            return kind
+    return None
+
+# ---------------- Format Sniffing ---------------- #
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"   # legacy .xls (BIFF)
+ZIP_MAGIC = b"PK\x03\x04"                            # .xlsx (OOXML)
+HTML_MARKERS = (b"<html", b"<table", b"<!doctype html", b"<meta", b"<head", b"<body", b"<style")
+XML_DECLARATION = b"<?xml"                           # XHTML, or SpreadsheetML 2003 (<Workbook>)
+
+def _read_head(file_path, size):
+    # file_path may also be an in-memory buffer (ZIP member); leave it rewound
+    if hasattr(file_path, "read"):
+        file_path.seek(0)
+        head = file_path.read(size)
+        file_path.seek(0)
+        return head
+    with open(file_path, "rb") as fh:
+        return fh.read(size)
+
+def sniff_format(file_path, sample_size=2048):
+    """
+    Detect the real format of a DMS export from its first bytes:
+    'xls', 'xlsx', 'html', 'xml' or 'text'. The extension is not trusted because
+    many ".xls" exports are really HTML tables. 'xml' is any other XML document
+    (e.g. an Excel 2003 SpreadsheetML ".xls"), which read_file does not parse.
+    """
+    head = _read_head(file_path, sample_size)
+    if head.startswith(OLE2_MAGIC):
+        return "xls"
+    if head.startswith(ZIP_MAGIC):
+        return "xlsx"
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        probe = head.decode("utf-16", errors="ignore").encode("ascii", errors="ignore")
+    else:
+        probe = head
+    probe = probe.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if probe.startswith(XML_DECLARATION):
+        # XHTML: the XML declaration comes before the doctype / <html> element; SpreadsheetML
+        # has a <Table> element too (often past the sample, after its <Styles>) but no HTML table
+        if b"<workbook" not in probe and (b"<html" in probe or b"<!doctype html" in probe):
+            return "html"
+        return "xml"
+    if probe.startswith(HTML_MARKERS) or b"<table" in probe:
+        return "html"
+    return "text"
+
+# ---------------- File Reader ---------------- #
+def _text_dtypes(text_cols):
+    # header name -> str for the columns parsed as text; names the file lacks are ignored
+    return {col: str for col in text_cols} or None
+
+def _usecols(columns):
+    # header names -> usecols for the Excel readers; names the file lacks are ignored
+    return (lambda name: name in columns) if columns else None
+
+def read_file(file_path, header=None, fmt=None, text_cols=(), columns=()):
+    """
+    Parse a file (path or binary buffer) with the engine matching its sniffed format.
+    text_cols: header names parsed as strings instead of inferring their type.
+    columns: header names to keep, others are skipped by the xlsx/xls readers (() keeps all).
+    Text and HTML keep every column: read_html has no usecols, and with usecols read_csv
+    no longer skips rows with too many fields.
+    """
+    try:
+        fmt = fmt or sniff_format(file_path)
+        if fmt == "xlsx":
+            return pd.read_excel(file_path, header=header, engine="openpyxl", dtype=_text_dtypes(text_cols),
+                                 usecols=_usecols(columns))
+        if fmt == "xls":
+            return pd.read_excel(file_path, header=header, engine="xlrd", dtype=_text_dtypes(text_cols),
+                                 usecols=_usecols(columns))
+        if fmt == "xml":
+            return None  # not a table export (see sniff_format)
+        if fmt == "html":
+            # read_html has no dtype: converters get the raw cell text (empty cells stay missing)
+            return pd.concat(pd.read_html(file_path, header=header, converters=_text_dtypes(text_cols)),
+                             ignore_index=True)
+        # CSV / TXT best-effort
+        return read_text(file_path, header=header, text_cols=text_cols)
+    except Exception:
+        return None
+
+# ---------------- Text Reader ---------------- #
+# CSV/TXT exports: encoding and delimiter are sniffed once from a bounded sample, then
+# the whole file is parsed by the C engine. The Python engine (with its own delimiter
+# detection) is only used for files the C engine rejects.
+TEXT_SAMPLE_SIZE = 64 * 1024
+TEXT_DELIMITERS = ",;\t|"
+FALLBACK_ENCODING = "windows-1252"
+
+def sniff_text(sample):
+    """(encoding, delimiter) of a text export from its first bytes; delimiter None if undecided."""
+    if sample.startswith((b"\xff\xfe", b"\xfe\xff")):
+        encoding = "utf-16"
+        text = sample.decode(encoding, errors="ignore")
+    else:
+        encoding = "utf-8"
+        try:
+            text = sample.decode(encoding)
+        except UnicodeDecodeError as e:
+            if e.start < len(sample) - 3:  # not just a character cut at the sample's end
+                encoding = FALLBACK_ENCODING
+            text = sample.decode(encoding, errors="ignore")
+    lines = [line for line in text.splitlines()[:-1] or text.splitlines() if line.strip()][:50]
+    delimiter = None
+    for candidate in (lines, lines[:1]):  # whole sample, else the first line as the Python engine does
+        try:
+            delimiter = csv.Sniffer().sniff("\n".join(candidate), delimiters=TEXT_DELIMITERS).delimiter
+            break
+        except csv.Error:
+            continue
+    return encoding, delimiter
+
+def _rewind(file_path):
+    if hasattr(file_path, "seek"):
+        file_path.seek(0)
+
+def read_text(file_path, header=None, text_cols=()):
+    """Parse a CSV/TXT export (path or binary buffer); rows with too many fields are skipped."""
+    encoding, delimiter = sniff_text(_read_head(file_path, TEXT_SAMPLE_SIZE))
+    # the sample can miss a later non-UTF-8 byte: only then is the file read a second time
+    encodings = list(dict.fromkeys((encoding, FALLBACK_ENCODING)))
+    if delimiter is not None:
+        for enc in encodings:
+            try:
+                return pd.read_csv(file_path, header=header, sep=delimiter, engine="c",
+                                   on_bad_lines="skip", encoding=enc, dtype=_text_dtypes(text_cols))
+            except UnicodeDecodeError:
+                _rewind(file_path)
+            except (pd.errors.ParserError, ValueError):
+                _rewind(file_path)
+                break
+    for enc in encodings:
+        try:
+            return pd.read_csv(file_path, header=header, sep=None, engine="python",
+                               on_bad_lines="skip", encoding=enc, dtype=_text_dtypes(text_cols))
+        except UnicodeDecodeError:
+            _rewind(file_path)
+    return None
+
+# ---------------- Chunked Reading ---------------- #
+# Very large exports (a central warehouse Stock file can have millions of rows) are parsed
+# CHUNK_ROWS rows at a time and reduced chunk by chunk, so only one chunk of raw rows is in
+# memory at once. .xlsx sheets are streamed by openpyxl in read-only mode (their shared
+# strings table is still loaded whole) and text files by the C engine; .xls (at most 65536
+# rows) and HTML tables are parsed whole and then sliced.
+# A file the streaming readers give up on part-way is parsed whole by read_file instead.
+# Every chunk infers its column types on its own rows, so a column whose type must not depend
+# on where the chunk boundaries fall (a numeric part number with blanks) is a text column.
+CHUNK_ROWS = int(os.environ.get("HYUNDAI_CHUNK_ROWS", "100000"))
+
+def _xlsx_chunks(file_path, header, chunk_rows, text_cols, columns):
+    # cells converted as pandas' openpyxl reader converts them, and every chunk parsed by the
+    # same TextParser call read_excel makes, with the header row in front of it
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+    from pandas.io.parsers import TextParser
+
+    def value(cell):
+        if cell.value is None:
+            return ""
+        if cell.data_type == TYPE_ERROR:
+            return np.nan
+        if cell.data_type == TYPE_NUMERIC:
+            return int(cell.value) if int(cell.value) == cell.value else float(cell.value)
+        return cell.value
+
+    def parse(rows):
+        width = max(len(row) for row in [head] + rows)
+        data = [row + [""] * (width - len(row)) for row in [head] + rows]
+        return TextParser(data, header=0, skip_blank_lines=False, dtype=_text_dtypes(text_cols),
+                          usecols=_usecols(columns)).read()
+
+    book = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = book.worksheets[0]
+        sheet.reset_dimensions()
+        head, rows, blanks, parsed = None, [], [], 0
+        for row_no, row in enumerate(sheet.rows):
+            values = [value(cell) for cell in row]
+            while values and values[-1] == "":
+                values.pop()
+            if row_no < header:
+                continue
+            if row_no == header:
+                head = values
+            elif not values:
+                blanks.append(values)  # kept only if a later row has data, like read_excel's trailing trim
+            else:
+                rows += blanks + [values]
+                blanks = []
+                if len(rows) >= chunk_rows:
+                    yield parse(rows)
+                    rows, parsed = [], parsed + 1
+        if head is not None and (rows or not parsed):
+            yield parse(rows)
+    finally:
+        book.close()
+
+def _text_chunks(file_path, header, chunk_rows, text_cols, encoding, delimiter):
+    with pd.read_csv(file_path, header=header, sep=delimiter, engine="c", on_bad_lines="skip",
+                     encoding=encoding, chunksize=chunk_rows, dtype=_text_dtypes(text_cols)) as reader:
+        yield from reader
+
+def _frame_chunks(file_path, header, chunk_rows, text_cols, columns, fmt):
+    df = read_file(file_path, header=header, fmt=fmt, text_cols=text_cols, columns=columns)
+    if df is None:
+        raise ValueError("unreadable")
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def _chunk_readers(file_path, header, chunk_rows, text_cols, columns, fmt):
+    # alternatives in order of preference, each a fresh chunk iterator
+    if fmt == "xlsx":
+        yield _xlsx_chunks(file_path, header, chunk_rows, text_cols, columns)
+    elif fmt == "text":
+        encoding, delimiter = sniff_text(_read_head(file_path, TEXT_SAMPLE_SIZE))
+        if delimiter is not None:
+            for enc in dict.fromkeys((encoding, FALLBACK_ENCODING)):
+                yield _text_chunks(file_path, header, chunk_rows, text_cols, enc, delimiter)
+    yield _frame_chunks(file_path, header, chunk_rows, text_cols, columns, fmt)
+
+def reduce_chunks(file_path, fn, header=None, fmt=None, chunk_rows=CHUNK_ROWS, text_cols=(), columns=()):
+    """
+    fn(chunk) over a file (path or binary buffer) read chunk_rows rows at a time, each chunk
+    parsed as read_file parses those rows (text_cols, columns as there); the non-None results
+    concatenated. None if the file is unreadable or fn returned None for every chunk. Only
+    text_cols are typed the same way in every chunk; the other columns' types are inferred per chunk.
+    """
+    try:
+        fmt = fmt or sniff_format(file_path)
+    except Exception:
+        return None
+    for chunks in _chunk_readers(file_path, header, chunk_rows, text_cols, columns, fmt):
+        parts = []
+        while parts is not None:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return pd.concat(parts, ignore_index=True) if parts else None
+            except Exception:
+                parts = None  # reader failed (not fn): try the next alternative from the start
+                _rewind(file_path)
+                continue
+            part = fn(chunk)
+            if part is not None:
+                parts.append(part)
+    return None
+
+# ---------------- Column Projection ---------------- #
+# Reading a single column (e.g. the quantity summed by validate_cross_sums) without
+# building the whole frame: .xlsx sheets are streamed with lxml, .xls columns come
+# straight from xlrd, plain single-table HTML is walked with lxml. Anything else
+# falls back to read_file. Values match what read_file would put in that column.
+_SSML = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_RELS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+def _col_index(ref):
+    # "K12" -> 10
+    n = 0
+    for ch in ref:
+        if ch.isdigit():
+            break
+        n = n * 26 + ord(ch.upper()) - 64
+    return n - 1
+
+def _pick_position(header_values, position, names):
+    # same choice as the validators: fixed position, or first candidate name found in the header
+    if position is not None:
+        return position
+    for name in names:
+        if name in header_values:
+            return header_values.index(name)
+    return None
+
+def _xlsx_column(file_path, header, position, names):
+    from lxml import etree
+
+    with zipfile.ZipFile(file_path) as zf:
+        workbook = etree.fromstring(zf.read("xl/workbook.xml"))
+        rid = workbook.find(f"{_SSML}sheets/{_SSML}sheet").get(f"{_RELS}id")
+        rels = etree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        target = next(rel.get("Target") for rel in rels if rel.get("Id") == rid)
+        sheet_path = target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+        shared = None
+        def shared_strings():
+            nonlocal shared
+            if shared is None:
+                shared = []
+                if "xl/sharedStrings.xml" in zf.namelist():
+                    for si in etree.fromstring(zf.read("xl/sharedStrings.xml")).iter(f"{_SSML}si"):
+                        t = si.find(f"{_SSML}t")
+                        shared.append(t.text or "" if t is not None else
+                                      "".join(r.text or "" for r in si.iterfind(f"{_SSML}r/{_SSML}t")))
+            return shared
+
+        def value(c):
+            t = c.get("t", "n")
+            if t == "inlineStr":
+                return "".join(x.text or "" for x in c.iter(f"{_SSML}t"))
+            v = c.find(f"{_SSML}v")
+            if v is None or v.text is None:
+                return None
+            if t == "s":
+                return shared_strings()[int(v.text)]
+            if t == "n":
+                return float(v.text)
+            if t == "b":
+                return v.text == "1"
+            if t == "e":
+                return np.nan
+            return v.text
+
+        values = []
+        row_no = 0
+        with zf.open(sheet_path) as fh:
+            for _, row in etree.iterparse(fh, tag=f"{_SSML}row"):
+                row_no = int(row.get("r", row_no + 1))
+                idx = row_no - 1
+                if idx == header and position is None:
+                    cells = {}
+                    for c in row.iterchildren(f"{_SSML}c"):
+                        cells[_col_index(c.get("r"))] = value(c)
+                    width = max(cells) + 1 if cells else 0
+                    position = _pick_position([cells.get(i) for i in range(width)], None, names)
+                    if position is None:
+                        return pd.Series([], dtype=object)
+                elif idx > header and position is not None:
+                    cell = None
+                    for c in row.iterchildren(f"{_SSML}c"):
+                        if _col_index(c.get("r")) == position:
+                            cell = value(c)
+                            break
+                    values.append(cell)
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+    return pd.Series(values, dtype=object)
+
+def _xls_column(file_path, header, position, names):
+    import xlrd
+
+    if hasattr(file_path, "read"):
+        book = xlrd.open_workbook(file_contents=file_path.getvalue(), on_demand=True)
+    else:
+        book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        if position is None:
+            header_values = sheet.row_values(header) if header < sheet.nrows else []
+            position = _pick_position(header_values, None, names)
+        if position is None or position >= sheet.ncols or header + 1 >= sheet.nrows:
+            return pd.Series([], dtype=object)
+        values = []
+        for cell in sheet.col_slice(position, start_rowx=header + 1):
+            if cell.ctype in (xlrd.XL_CELL_NUMBER, xlrd.XL_CELL_TEXT):
+                values.append(cell.value)
+            elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                values.append(bool(cell.value))
+            else:  # empty / blank / error / date: never a quantity
+                values.append(None)
+        return pd.Series(values, dtype=object)
+    finally:
+        book.release_resources()
+
+def _html_column(file_path, header, position, names):
+    # only the plain single-table layout; anything pandas would reshape (spans, th/thead,
+    # hidden cells, one-cell rows) returns None and is parsed in full instead
+    import lxml.html
+
+    root = lxml.html.parse(file_path).getroot()
+    tables = root.findall(".//table") if root is not None else []
+    if len(tables) != 1 or tables[0].find(".//table") is not None:
+        return None
+    table = tables[0]
+    if (table.find(".//thead") is not None or table.find(".//tfoot") is not None
+            or table.find(".//th") is not None
+            or table.xpath(".//*[@colspan or @rowspan or contains(@style, 'display')]")):
+        return None
+    rows = [tr.findall("td") for tr in table.iter("tr")]
+    if any(len(cells) < 2 for cells in rows):
+        return None
+    if position is None:
+        if header >= len(rows):
+            return pd.Series([], dtype=object)
+        position = _pick_position([td.text_content().strip() for td in rows[header]], None, names)
+        if position is None:
+            return pd.Series([], dtype=object)
+    values = []
+    for cells in rows[header + 1:]:
+        v = cells[position].text_content().strip() if position < len(cells) else None
+        if v and "," in v and _THOUSANDS.fullmatch(v):
+            v = v.replace(",", "")  # read_html's default thousands=","
+        values.append(v)
+    return pd.Series(values, dtype=object)
+
+_THOUSANDS = re.compile(r"[-+]?\d{1,3}(,\d{3})+(\.\d*)?")
+
+_COLUMN_READERS = {"xlsx": _xlsx_column, "xls": _xls_column, "html": _html_column}
+_COLUMN_ENGINES = {"xlsx": "lxml", "xls": "xlrd", "html": "lxml"}  # for the timing records
+
+def frame_column(df, position=None, names=()):
+    """The column a projected read selects, taken from an already parsed frame (None if absent)."""
+    if df is None:
+        return None
+    pos = _pick_position(list(df.columns), position, names)
+    if pos is None or pos >= df.shape[1]:
+        return pd.Series([], dtype=object)
+    return df.iloc[:, pos]
+
+def read_column(file_path, header=None, position=None, names=(), fmt=None):
+    """
+    One column of a file: the column at `position`, or the first of `names` found in the
+    header row. Returns a Series (empty if the column does not exist) or None if unreadable.
+    """
+    try:
+        fmt = fmt or sniff_format(file_path)
+        reader = _COLUMN_READERS.get(fmt)
+        if reader is not None:
+            try:
+                col = reader(file_path, header, position, names)
+                if col is not None:
+                    return col
+            except Exception:
+                pass  # anything unexpected in the markup: let pandas parse the whole file
+            if hasattr(file_path, "seek"):
+                file_path.seek(0)
+        return frame_column(read_file(file_path, header=header, fmt=fmt), position, names)
+    except Exception:
+        return None
+
+# ---------------- Upload Sources ---------------- #
+class DirectorySource:
+    """Report files on disk: an extracted upload or a brand/dealer/location tree."""
+
+    def listdir(self, location_path):
+        # scandir: file type comes with the directory entry, no extra stat per file
+        with os.scandir(location_path) as entries:
+            return [e.name for e in entries if e.is_file()]
+
+    def open(self, location_path, file_name):
+        return os.path.join(location_path, file_name)
+
+    def version(self, location_path, file_name):
+        # cheap stand-in for the content: a file whose mtime and size are unchanged is not re-read
+        st = os.stat(os.path.join(location_path, file_name))
+        return st.st_mtime_ns, st.st_size
+
+    def fingerprint(self, location_path, file_name):
+        # same "crc32-size" form as ZipSource, so extracted and in-place runs share cache entries
+        crc = 0
+        with open(os.path.join(location_path, file_name), "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                crc = zlib.crc32(chunk, crc)
+            size = fh.tell()
+        return f"{crc:08x}-{size}"
+
+    def close(self):
+        pass
+
+class ZipSource:
+    """
+    Report files read straight from the uploaded ZIP, one member at a time,
+    without extracting the archive. location paths are "brand/dealer/location"
+    member prefixes and only members named like a known report are indexed.
+    """
+
+    def __init__(self, zip_file):
+        # a path can be re-opened by worker processes; an in-memory upload cannot
+        self.zip_path = os.fspath(zip_file) if isinstance(zip_file, (str, os.PathLike)) else None
+        self._zip = zipfile.ZipFile(zip_file)
+        self._members = defaultdict(list)  # location_path -> [report file names]
+        self._crcs = {}                    # member name -> "crc32-size" from the central directory
+        self.locations = []                # [(brand, dealer, location, location_path)]
+        seen = set()
+        for info in self._zip.infolist():
+            parts = info.filename.rstrip("/").split("/")
+            if len(parts) < 3 or (len(parts) == 3 and not info.is_dir()):
+                continue
+            brand, dealer, location = parts[:3]
+            location_path = "/".join(parts[:3])
+            if location_path not in seen:
+                seen.add(location_path)
+                self.locations.append((brand, dealer, location, location_path))
+            if len(parts) == 4 and not info.is_dir() and classify_file(parts[3]):
+                self._members[location_path].append(parts[3])
+                self._crcs[info.filename] = f"{info.CRC:08x}-{info.file_size}"
+
+    def listdir(self, location_path):
+        return list(self._members.get(location_path, []))
+
+    def open(self, location_path, file_name):
+        return io.BytesIO(self._zip.read(f"{location_path}/{file_name}"))
+
+    def version(self, location_path, file_name):
+        return self.fingerprint(location_path, file_name)  # members never change
+
+    def fingerprint(self, location_path, file_name):
+        # no decompression: the archive already records every member's CRC
+        return self._crcs[f"{location_path}/{file_name}"]
+
+    def close(self):
+        self._zip.close()
+
+    def __getstate__(self):
+        if self.zip_path is None:
+            raise TypeError("ZipSource over an in-memory upload cannot be sent to worker processes")
+        return {"zip_path": self.zip_path}
+
+    def __setstate__(self, state):
+        self.__init__(state["zip_path"])
+
+# ---------------- Parsed Frame Store ---------------- #
+class FrameStore:
+    """
+    Parsed frames for one upload, keyed by (location_path, report kind).
+    Every file is decoded once and then shared by validate_periods,
+    validate_cross_sums and process_files. Frames handed out are shared:
+    callers must not modify them in place.
+    """
+
+    def __init__(self, frames=None, source=None, index=None, parse_cache=None, timings=None,
+                 date_formats=None):
+        # frames: optional {(location_path, kind): [(file_name, df)]} already parsed elsewhere
+        # index:  optional {location_path: {kind: [file_name]}} already scanned elsewhere
+        # parse_cache: optional parse_cache.ParseCache shared across uploads
+        # timings: timings.StageTimings collecting per-file/per-stage times (a new one by default)
+        # date_formats: optional {(kind, column): format} detected elsewhere for this upload
+        self._frames = dict(frames) if frames else {}
+        self._index = dict(index) if index else {}
+        self.source = source if source is not None else DirectorySource()
+        self.parse_cache = parse_cache
+        self.formats = {}  # file_path -> sniffed format, kept after frames are released
+        self._fingerprints = {}  # (location_path, file_name) -> (source version, content fingerprint)
+        self.timings = timings if timings is not None else StageTimings()
+        # (kind, column) -> date format detected in this upload's files (dates.parse_dates)
+        self.date_formats = dict(date_formats) if date_formats else {}
+
+    def index(self, location_path):
+        """{kind: [file_name]} for a location, from a single directory scan shared by every stage."""
+        if location_path not in self._index:
+            kinds = {kind: [] for kind in REPORT_KINDS}
+            for file in self.source.listdir(location_path):
+                kind = classify_file(file)
+                if kind:
+                    kinds[kind].append(file)
+            self._index[location_path] = kinds
+        return self._index[location_path]
+
+    def fingerprint(self, location_path):
+        """
+        Digest of a location's report files (names + content checksums), for incremental runs.
+        A file's checksum is computed once and reused while its source version (mtime and
+        size on disk) is unchanged, so validation and generation do not re-read every file.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for kind, files in self.index(location_path).items():
+            for file in sorted(files):
+                h.update(f"{kind}\0{file}\0{self._file_fingerprint(location_path, file)}\n".encode())
+        return h.hexdigest()
+
+    def _file_fingerprint(self, location_path, file):
+        version = self.source.version(location_path, file)
+        cached = self._fingerprints.get((location_path, file))
+        if cached is None or cached[0] != version:
+            cached = (version, self.source.fingerprint(location_path, file))
+            self._fingerprints[(location_path, file)] = cached
+        return cached[1]
+
+    def column(self, location_path, kind, names):
+        """
+        [(file_name, Series or None)]: one schema column of every `kind` file, typed as in
+        the schema; `names` are its candidate header names, the first one present is used.
+        Frames this store already parsed are used as they are; other files get a projected
+        read (read_column), kept neither in the store nor in the parse cache. The cache holds
+        full parses only, so it is not looked up: the Lists are never parsed whole, and a key
+        means copying and hashing the whole file.
+        """
+        key = (location_path, kind)
+        if key in self._frames:
+            return [(file, frame_column(df, names=names)) for file, df in self._frames[key]]
+        schema = SCHEMAS[kind]
+        header = schema.header
+        # positional schemas: the column's place in schema.columns; otherwise its header name
+        position = schema.columns.index(names[0]) if schema.columns is not None else None
+        label = location_label(location_path)
+        columns = []
+        for file in self.index(location_path)[kind]:
+            t0 = time.perf_counter()
+            fmt, engine, col = None, None, None
+            try:
+                src = self.source.open(location_path, file)
+                fmt = sniff_format(src)
+                engine = _COLUMN_ENGINES.get(fmt)
+                col = read_column(src, header, position, () if position is not None else names, fmt)
+                if col is not None and not col.empty:
+                    col = convert(col, schema.dtypes.get(names[0]), (kind, names[0]), self.date_formats)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                fmt = "unreadable"
+            self.formats[os.path.join(location_path, file)] = fmt
+            self.timings.add("read column", time.perf_counter() - t0, label, file, fmt,
+                             None if col is None else len(col), engine)
+            columns.append((file, col))
+        return columns
+
+    def frames(self, location_path, kind):
+        """Return [(file_name, df)] for every `kind` file in the location. df is None if unreadable."""
+        key = (location_path, kind)
+        if key not in self._frames:
+            header = REPORT_KINDS[kind][1]
+            parsed = []
+            for file in self.index(location_path)[kind]:
+                t0 = time.perf_counter()
+                fmt, df, cached = self._parse(location_path, file, kind, header)
+                self.formats[os.path.join(location_path, file)] = fmt
+                self.timings.add("parse (cached)" if cached else "parse", time.perf_counter() - t0,
+                                 location_label(location_path), file, fmt, None if df is None else len(df),
+                                 "parse cache" if cached else None)
+                parsed.append((file, df))
+            self._frames[key] = parsed
+        return self._frames[key]
+
+    def reduce(self, location_path, kind, fn, chunk_rows=CHUNK_ROWS):
+        """
+        [(file_name, df)]: fn over every `kind` file with the schema applied, df None if the
+        file is unreadable (see reduce_chunks). Frames already parsed (here or in the parse
+        cache) are passed to fn whole; other files are read in chunks and nothing is kept.
+        """
+        key = (location_path, kind)
+        if key in self._frames:
+            return [(file, None if df is None else fn(df)) for file, df in self._frames[key]]
+        header = REPORT_KINDS[kind][1]
+        label = location_label(location_path)
+        reduced = []
+        for file in self.index(location_path)[kind]:
+            t0 = time.perf_counter()
+            stage, engine, rows, out, hit = "parse", "chunked", 0, None, None
+            try:
+                src = self.source.open(location_path, file)
+                if self.parse_cache is not None:
+                    if not hasattr(src, "read"):
+                        with open(src, "rb") as fh:
+                            src = io.BytesIO(fh.read())
+                    cache_key = content_key(src.getbuffer(), header, kind, self._date_hints(kind))
+                    hit = self._cache_get(cache_key, kind)
+                fmt = hit[1] if hit is not None else sniff_format(src)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                fmt = "unreadable"
+            if hit is not None:
+                stage, engine, rows = "parse (cached)", "parse cache", len(hit[0])
+                out = fn(hit[0])
+            elif fmt != "unreadable":
+                def chunk_fn(chunk):
+                    nonlocal rows
+                    rows += len(chunk)
+                    return fn(apply_schema(chunk, kind, self.date_formats))
+
+                out = reduce_chunks(src, chunk_fn, header, fmt, chunk_rows, text_columns(kind), read_columns(kind))
+            self.formats[os.path.join(location_path, file)] = fmt
+            self.timings.add(stage, time.perf_counter() - t0, label, file, fmt,
+                             None if out is None else rows, engine)
+            reduced.append((file, out))
+        return reduced
+
+    def _parse(self, location_path, file, kind, header):
+        # (fmt, df, from_cache) with the kind's schema applied; content-hash lookup in the parse cache first
+        try:
+            src = self.source.open(location_path, file)
+            cache_key = None
+            if self.parse_cache is not None:
+                if not hasattr(src, "read"):
+                    with open(src, "rb") as fh:
+                        src = io.BytesIO(fh.read())
+                cache_key = content_key(src.getbuffer(), header, kind, self._date_hints(kind))
+                hit = self._cache_get(cache_key, kind)
+                if hit is not None:
+                    return hit[1], hit[0], True
+            fmt = sniff_format(src)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return "unreadable", None, False
+        raw = read_file(src, header=header, fmt=fmt, text_cols=text_columns(kind), columns=read_columns(kind))
+        df = apply_schema(raw, kind, self.date_formats)
+        if cache_key is not None and df is not None:
+            # the entry keeps the formats this parse left behind, restored on a hit (_cache_get)
+            df.attrs["date_formats"] = self._date_hints(kind)
+            self.parse_cache.put(cache_key, df, fmt)
+            del df.attrs["date_formats"]
+        return fmt, df, False
+
+    def _date_hints(self, kind):
+        # this upload's detected format of each of the kind's date columns (None: not yet)
+        return tuple(self.date_formats.get((kind, col)) for col in date_columns(kind))
+
+    def _cache_get(self, cache_key, kind):
+        # parse cache hit with the formats its parse detected merged into date_formats, as if
+        # the file had been parsed here: later files of the kind get the same hints either way
+        hit = self.parse_cache.get(cache_key)
+        if hit is not None:
+            for col, fmt in zip(date_columns(kind), hit[0].attrs.pop("date_formats", ())):
+                if fmt is not None:
+                    self.date_formats[(kind, col)] = fmt
+        return hit
+
+    def format_counts(self):
+        """{format: number of files} over everything parsed so far."""
+        counts = {}
+        for fmt in self.formats.values():
+            counts[fmt] = counts.get(fmt, 0) + 1
+        return counts
+
+    def cached(self, location_path):
+        """Frames already parsed for a location, e.g. to hand them to a worker process."""
+        return {k: v for k, v in self._frames.items() if k[0] == location_path}
+
+    def release(self, location_path):
+        """Drop every cached frame of a location once the last stage is done with it."""
+        for key in [k for k in self._frames if k[0] == location_path]:
+            del self._frames[key]
@@ -1,456 +1,466 @@
-def process_files(validation_errors, all_locations, start_date, end_date, total_locations,
-                  progress_bar, status_text, select_categories):
-
-    import streamlit as st
-    import os
-    import io
-    import zipfile
-    import pandas as pd
-    from datetime import datetime, timedelta
-    from collections import defaultdict
-
-    # Keep DataFrame previews separate from downloadable file bytes
+import io
+import time
+import shutil
+import zipfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from frame_store import FrameStore
+from schemas import stage_kinds, output_frame
+from writers import write_output, file_format, output_stem, MIME_TYPES, DEFAULT_BACKEND, DEFAULT_FORMAT
+from report_store import ReportStore
+from timings import location_label
+
+# ---------- helpers ----------
+def transit_remarks(oem_work):
+    """
+    Add transit (quantity still in the supply chain), T/F (current quantity all shipped)
+    and Remark to BO LIST rows, in place; returns oem_work.
+    """
+    oem_work['transit'] = (
+        oem_work.get('B/O', 0)
+        + oem_work.get('PROCESSING_ALLOCATION', 0)
+        + oem_work.get('PROCESSING_ON-PICK', 0)
+        + oem_work.get('PROCESSING_ON-PACK', 0)
+        + oem_work.get('PROCESSING_PACKED', 0)
+        + oem_work.get('PROCESSING_INVOICE', 0)
+    )
+    oem_work['T/F'] = oem_work.get('QUANTITY_CURRENT', 0).eq(oem_work.get('PROCESSING_SHIPPEO', 0))
+
+    # Remark, columnar:  transit == 0 & T/F -> Ok;  transit > 0 & !T/F -> Ok;
+    #                    transit == 0 & !T/F -> Pls Check;  anything else -> None
+    no_transit = oem_work['transit'].eq(0.0).to_numpy()
+    in_transit = oem_work['transit'].gt(0.0).to_numpy()
+    tf = oem_work['T/F'].astype(bool).to_numpy()
+    pls_check = no_transit & ~tf
+    oem_work['Remark'] = np.select([no_transit & tf, in_transit & ~tf, pls_check],
+                                   ['Ok', 'Ok', 'Pls Check'], default=None)
+    # "Pls Check" rows carry the current quantity as transit
+    oem_work['transit'] = np.where(pls_check, oem_work['QUANTITY_CURRENT'], oem_work['transit'])
+    return oem_work
+
+def oem_summary(oem_df):
+    # "Check Order status" sheet: distinct (Location, OrderNumber) of "Pls Check" rows
+    summary = (
+        oem_df.loc[oem_df['Remark'].astype(str).str.strip().str.lower().eq('pls check'),
+                   ['Location', 'OrderNumber']]
+              .drop_duplicates()
+    )
+    # keep a visible row even if empty (optional)
+    if summary.empty:
+        summary = pd.DataFrame([{'Location': '—', 'OrderNumber': 'No "Pls Check" rows'}])
+    return summary
+
+# Low-cardinality labels are held as categoricals and integer quantities in the smallest
+# integer type that keeps their values while the output frames stay in the report store.
+# This only saves memory: every frame is expanded (expand_frame) before it is written, so
+# a dealer's combined file has the dtypes of its locations' files.
+LABEL_COLS = ('Brand', 'Dealer', 'Location', '__source_file__', 'Remark')
+QTY_COLS = ('POQty', 'Qty')
+
+def label_frame(df, brand, dealer, location, file):
+    """Shallow copy of a parsed frame with its Brand/Dealer/Location/__source_file__ columns (categorical)."""
+    df = df.copy(deep=False)
+    codes = np.zeros(len(df), dtype=np.int8)
+    for col, value in (('__source_file__', file), ('Brand', brand), ('Dealer', dealer), ('Location', location)):
+        df[col] = pd.Categorical.from_codes(codes, categories=[value])
+    return df
+
+def compact_frame(df):
+    """Categorical LABEL_COLS and downcast integer QTY_COLS, in place; returns df."""
+    for col in LABEL_COLS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in QTY_COLS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+def expand_frame(df):
+    """
+    A frame as it is written: plain (not categorical) LABEL_COLS values and int64 integer
+    QTY_COLS, whether or not it was compacted (float quantities never are); a shallow copy.
+    """
+    df = df.copy(deep=False)
+    for col in LABEL_COLS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    for col in QTY_COLS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype('int64')
+    return df
+
+def concat_frames(frames):
+    """pd.concat that keeps categorical columns categorical (categories unioned) instead of decoding them."""
+    frames = list(frames)
+    categories = defaultdict(list)
+    for df in frames:
+        for col, dtype in df.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                categories[col].append(dtype.categories)
+    union = {col: pd.CategoricalDtype(cats[0].append(cats[1:]).unique())
+             for col, cats in categories.items() if len(cats) == len(frames)}
+    if union and len(frames) > 1:
+        frames = [df.astype(union) for df in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def stock_rows(df, select_categories):
+    """
+    A Stock frame, or one chunk of it, reduced to what Stock_*.xlsx keeps: part numbers
+    cleaned up, rows filtered by PART TYPE for the selected categories, projected to
+    PART NO ?/ON-HAND. None for an empty frame (nothing readable in the file).
+    """
+    if df.empty:
+        return None
+    part_no = (df['PART NO ?'].astype(str).str.strip()
+                              .str.replace('.', '', regex=False).str.replace('-', '', regex=False))
+    part_type = df['PART TYPE'].astype(str).str.strip()
+    out = pd.DataFrame({'PART NO ?': part_no, 'ON-HAND': df['ON-HAND']})
+    if select_categories == ['Spares']:
+        out = out[part_type.isin(['X', 'Y'])]
+    elif select_categories == ['Accessories']:
+        out = out[part_type == 'A']
+    elif set(select_categories) == {'Spares', 'Accessories'}:
+        out = out[part_type.isin(['X', 'Y', 'A'])]
+    return out
+
+# In the non-xlsx output formats the OEM "Check Order status" sheet is a file of its own,
+# named like its OEM_ output with this prefix instead of "OEM"
+OEM_STATUS = "OEMStatus"
+
+def status_name(oem_name):
+    """File name of the "Check Order status" output that goes with an OEM_ output."""
+    return OEM_STATUS + oem_name[len("OEM"):]
+
+def timed_output(timings, label, name, sheets, xlsx_backend=None, output_format=None):
+    """
+    write_output of the expanded frames, recorded as an "excel" stage; returns (bytes, seconds).
+    Parquet frames also get their report's OUTPUT_DTYPES (schemas.py): one Arrow schema per report.
+    """
+    fmt = output_format or DEFAULT_FORMAT
+    t0 = time.perf_counter()
+    sheets = [(sheet_name, expand_frame(df)) for sheet_name, df in sheets]
+    if fmt == "parquet":
+        report = output_stem(name).split("_")[0]
+        sheets = [(sheet_name, output_frame(report, df)) for sheet_name, df in sheets]
+    blob = write_output(sheets, fmt, xlsx_backend)
+    seconds = time.perf_counter() - t0
+    if timings is not None:
+        engine = (xlsx_backend or DEFAULT_BACKEND) if fmt == "xlsx" else {"parquet": "pyarrow"}.get(fmt, "to_csv")
+        timings.add("excel", seconds, label, name, fmt, sum(len(df) for _, df in sheets), engine=engine)
+    return blob, seconds
+
+# ---------- per location ----------
+def build_location_reports(brand, dealer, location, location_path, select_categories, store,
+                           xlsx_backend=None, output_format=None):
+    """
+    Build the OEM/Stock/Pending outputs of one location from its parsed frames.
+    Returns (previews, files, validation_errors); locations are independent, so
+    this is the unit of work for both the sequential and the parallel mode.
+    output_format: one of writers.OUTPUT_FORMATS, also the outputs' file extension.
+    """
     previews = {}  # name -> DataFrame
     files = {}     # name -> excel bytes
-
-    # ---------- helpers ----------
-    def read_file(file_path, header=None):
-        try:
-            lower = file_path.lower()
-            if lower.endswith(".xlsx"):
-                return pd.read_excel(file_path, header=header, engine="openpyxl")
-            if lower.endswith(".xls"):
-                try:
-                    return pd.read_excel(file_path, header=header, engine="xlrd")
-                except Exception:
-                    try:
-                      return pd.read_excel(file_path, header=header, engine="openpyxl")
-                    except:
-                      return pd.read_html(file_path, header=header)
-            # CSV / TXT best-effort
-            try:
-                return pd.read_csv(file_path, header=header, sep=None, engine="python",
-                                   on_bad_lines="skip", encoding="utf-8")
-            except UnicodeDecodeError:
-                return pd.read_csv(file_path, header=header, sep=None, engine="python",
-                                   on_bad_lines="skip", encoding="windows-1252")
-        except Exception:
-            return None
-    
-              
-    def to_num(s):
-        return pd.to_numeric(s, errors="coerce").fillna(0)
-
-    # For Stock: handle common header variants
-    STOCK_PART_COLS = ["PART NO ?", "PART NO", "PART NO.", "PART_NO", "PART NUMBER", "PART_NUMBER"]
-    STOCK_QTY_COLS  = ["ON-HAND", "ON HAND", "ONHAND", "ON_HAND", "QTY", "CLOSE_QTY"]
-
-    # ---------- per location ----------
-    for i, (brand, dealer, location, location_path) in enumerate(all_locations):
-        progress_bar.progress((i + 1) / max(total_locations, 1))
-        status_text.text(f"Generating reports for {location} ({i+1}/{total_locations})...")
-
-        BO_LIST = []
-        Stock_data = []
-        Receving_Pending_Detail = []
-        Receving_Today_Detail = []
-        Receving_Today_List = []
-        Receving_Pending_list = []
-        Transfer_List = []
-        Transfer_Detail = []
-
-        for file in os.listdir(location_path):
-            file_path = os.path.join(location_path, file)
-            if not os.path.isfile(file_path):
+    validation_errors = []
+    t0 = time.perf_counter()
+    label = location_label(location_path)
+    excel_seconds = 0.0
+    fmt = output_format or DEFAULT_FORMAT
+
+    BO_LIST = []
+    Stock_data = []
+    Receving_Pending_Detail = []
+    Receving_Today_Detail = []
+    Transfer_Detail = []
+
+    # frames come named, projected and typed (schemas.py); the Lists and Transfer List
+    # only feed the cross-sum checks and are not read here. Stock files can be very large:
+    # they are reduced to their output rows chunk by chunk while being read (stock_rows).
+    def kind_files(kind):
+        if kind == "stock":
+            return store.reduce(location_path, kind, lambda df: stock_rows(df, select_categories))
+        return store.frames(location_path, kind)
+
+    location_files = [(kind, file, parsed) for kind in stage_kinds("reports") for file, parsed in kind_files(kind)]
+    for kind, file, parsed in location_files:
+
+        # BO LIST (header row is the 2nd row -> header=1)
+        if kind == "bo list":
+            bo_df = parsed
+            if bo_df is None or bo_df.empty:
+                validation_errors.append(f"{location}: Unable to read BO LIST -> {file}")
                 continue
-
-            fl = file.lower().strip()
-
-            # BO LIST (header row is the 2nd row -> header=1)
-            if fl.startswith("bo list"):
-                custom_headers = [
-                    'ORDER NO', 'LINE', 'PART NO_ORDER', 'PART NO_CURRENT', 'PART NAME',
-                    'PARTSOURCE', 'QUANTITY_ORDER', 'QUANTITY_CURRENT', 'B/O', 'PO DATE',
-                    'PDC', 'ETA', 'MSG', 'PROCESSING_ALLOCATION', 'PROCESSING_ON-PICK',
-                    'PROCESSING_ON-PACK', 'PROCESSING_PACKED', 'PROCESSING_INVOICE',
-                    'PROCESSING_SHIPPEO', 'LOST QTY', 'ELAP']
-              
-                bo_df = read_file(file_path, header=1)
-                
-              # try:
-                #   bo_df.columns = custom_headers[:bo_df.shape[1]]
-                # except:
-                #bo_df = pd.concat(pd.read_html(file_path,header=1),ignore_index=True)
-                  
-                #bo_df.columns = custom_headers[:bo_df.shape[1]]
-                #st.Dataframe(bo_df)  
-                if bo_df is None or bo_df.empty:
-                    validation_errors.append(f"{location}: Unable to read BO LIST -> {file}")
-                    continue
-                bo_df.columns = custom_headers[:bo_df.shape[1]]
-
-                required_cols = ['ORDER NO', 'PART NO_CURRENT', 'PO DATE', 'QUANTITY_CURRENT', 'PROCESSING_ALLOCATION']
-                missing = [c for c in required_cols if c not in bo_df.columns]
-                if missing:
-                    validation_errors.append(f"{location}: BO LIST missing columns - {', '.join(missing)}")
-                    continue
-
-                bo_df['__source_file__'] = file
-                bo_df['Brand'] = brand
-                bo_df['Dealer'] = dealer
-                bo_df['Location'] = location
-                BO_LIST.append(bo_df)
+            required_cols = ['ORDER NO', 'PART NO_CURRENT', 'PO DATE', 'QUANTITY_CURRENT', 'PROCESSING_ALLOCATION']
+            missing = [c for c in required_cols if c not in bo_df.columns]
+            if missing:
+                validation_errors.append(f"{location}: BO LIST missing columns - {', '.join(missing)}")
                 continue
 
-            # STOCK
-            if fl.startswith("stock"):
-                sd = read_file(file_path, header=0)
-                if sd is None or sd.empty:
-                    validation_errors.append(f"{location}: Unable to read Stock -> {file}")
-                    continue
-                sd['Brand'] = brand
-                sd['Dealer'] = dealer
-                sd['Location'] = location
-                sd['__source_file__'] = file
-                Stock_data.append(sd)
-                
-              # # choose part / qty columns
-                # part_col = next((c for c in STOCK_PART_COLS if c in sd.columns), None)
-                # qty_col  = next((c for c in STOCK_QTY_COLS if c in sd.columns), None)
-                # if not part_col or not qty_col:
-                #     validation_errors.append(f"{location}: Stock file missing part/qty columns -> {file}")
-                #     continue
-
-                # sd['Brand'] = brand
-                # sd['Dealer'] = dealer
-                # sd['Location'] = location
-                # sd['__source_file__'] = file
-
-                # # Map PART TYPE -> New partcat
-                # if 'PART TYPE' in sd.columns:
-                #     sd['PART TYPE'] = sd['PART TYPE'].astype(str).str.strip()
-                #     sd['New partcat'] = sd['PART TYPE'].str.upper().map({'X': 'Spares','Y': 'Spares', 'A': 'Accessories'})
-                # else:
-                #     sd['New partcat'] = None
-
-                # # category filter
-                # # if select_categories!='All':
-                # #     sel = set([str(x).strip().lower() for x in select_categories])
-                # #     sd = sd[sd['New partcat'].astype(str).str.lower().isin(sel)]
-
-                # if select_categories==['Spares']:
-                #   sd = sd[sd['New partcat'].isin(select_categories)]
-                # elif select_categories==['Accessories']:
-                #   sd = sd[sd['New partcat'].isin(select_categories)]
-                # elif select_categories==['Spares','Accessories']:
-                #   sd = sd[sd['New partcat'].isin(select_categories)]
-                # elif select_categories==['All']:
-                #   sd=sd.copy()
-                  
-                # out = sd[['Brand', 'Dealer', 'Location', part_col, qty_col]].copy()
-                # out.rename(columns={part_col: 'Partnumber', qty_col: 'Qty'}, inplace=True)
-                # out['Partnumber']=out['Partnumber'].astype(str).str.strip()
-                # out['Qty'] = to_num(out['Qty']).astype(float)
-               
-                # Stock_data.append(out)
-                # continue
-
-            # RECEIVING PENDING DETAIL (header=1)receiving pending detail
-            if fl.startswith("receiving pending detail"):
-                cols = ['SEQ','CASE NO ','ORDER NO ','LINE NO','PART NO _SUPPLY','PART NO _ORDER','H/K','PART NAME',
-                        'SUPPLY QTY','ORDER QTY','ACCEPT QTY','CLAIM QTY','CLAIM TYPE','CLAIM CODE','LOC','LIST PRICE',
-                        'NDP (UNIT)','ED (UNIT)','MAT VALUE','DEPOT S/C','VOR S/C','OTHER CHARGES','STAX(%)','CTAX(%)',
-                        'ITAX(%)','TAX(%)','HSN CODE','TAX AMT','FRT/INS','SGST AMT','CGST AMT','IGST AMT','COMP CESS AMT',
-                        'LANDED COST','ORDER DATE','RECEIVING DATE','STATUS']
-                df = read_file(file_path, header=1)
-                try:
-                  df.columns = cols[:df.shape[1]]
-                except:
-                  df = pd.concat(pd.read_html(file_path, header=1),ignore_index=True)
-                  df.columns = cols[:df.shape[1]]
-                if df is None or df.empty:
-                    continue
-               # df.columns = cols[:df.shape[1]]
-                df['__source_file__'] = file
-                df['Brand'] = brand
-                df['Dealer'] = dealer
-                df['Location'] = location
-                Receving_Pending_Detail.append(df)
-                continue
+            BO_LIST.append(label_frame(bo_df, brand, dealer, location, file))
+            continue
 
-            # RECEIVING PENDING LIST (header=2)receiving pending detail
-            if fl.startswith("receiving pending list"):
-                cols = ['SEQ','H/K','GR_NO','GR_TYPE','GR_STATUS','INVOICE_NO','INVOICE_DATE','SHIPPED INFORMATION_SUPPLIER',
-                        'SHIPPED INFORMATION_TRUCK NO','SHIPPED INFORMATION_CARRIER NAME','SHIPPED INFORMATION_FINISH DATE',
-                        'SHIPPED INFORMATION_ACCEPT QTY','SHIPPED INFORMATION_CLAIM QTY','SHIPPED INFORMATION_MAT VALUE',
-                        'SHIPPED INFORMATION_FREIGHT AMT','SHIPPED INFORMATION_SGST AMT','SHIPPED INFORMATION_IGST AMT',
-                        'SHIPPED INFORMATION_TCS AMT','SHIPPED INFORMATION_TAX AMOUNT']
-                df = read_file(file_path, header=2)
-                try:
-                  df.columns = cols[:df.shape[1]]
-                except:
-                  df = pd.concat(pd.read_html(file_path, header=2),ignore_index=True)
-              
-                if df is not None and not df.empty:
-                    df.columns = cols[:df.shape[1]]
-                    df['__source_file__'] = file
-                    df['Brand'] = brand
-                    df['Dealer'] = dealer
-                    df['Location'] = location
-                    Receving_Pending_list.append(df)
+        # STOCK
+        if kind == "stock":
+            sd = parsed  # already filtered and projected by stock_rows
+            if sd is None:
+                validation_errors.append(f"{location}: Unable to read Stock -> {file}")
                 continue
+            Stock_data.append(label_frame(sd, brand, dealer, location, file))
+            continue
 
-            # RECEIVING TODAY LIST (header=2)
-            if fl.startswith("receiving today list"):
-                cols = ['SEQ','H/K','GR_NO','GR_TYPE','GR_STATUS','INVOICE_NO','INVOICE_DATE','SHIPPED INFORMATION_SUPPLIER',
-                        'SHIPPED INFORMATION_TRUCK NO','SHIPPED INFORMATION_CARRIER NAME','SHIPPED INFORMATION_FINISH DATE',
-                        'SHIPPED INFORMATION_ACCEPT QTY','SHIPPED INFORMATION_CLAIM QTY','SHIPPED INFORMATION_MAT VALUE',
-                        'SHIPPED INFORMATION_FREIGHT AMT','SHIPPED INFORMATION_SGST AMT','SHIPPED INFORMATION_IGST AMT',
-                        'SHIPPED INFORMATION_TCS AMT','SHIPPED INFORMATION_TAX AMOUNT']
-                df = read_file(file_path, header=2)
-               # df = read_file(file_path, header=2)
-                try:
-                  df.columns = cols[:df.shape[1]]
-                except:
-                  df = pd.concat(pd.read_html(file_path, header=2),ignore_index=True)
-                if df is not None and not df.empty:
-                  #  df.columns = cols[:df.shape[1]]
-                    df['__source_file__'] = file
-                    df['Brand'] = brand
-                    df['Dealer'] = dealer
-                    df['Location'] = location
-                    Receving_Today_List.append(df)
+        # RECEIVING PENDING DETAIL (header=1)
+        if kind == "receiving pending detail":
+            df = parsed
+            if df is None or df.empty:
                 continue
+            Receving_Pending_Detail.append(label_frame(df, brand, dealer, location, file))
+            continue
 
-            # RECEIVING TODAY DETAIL (header=1)
-            if fl.startswith("receiving today detail"):
-                cols = ['SEQ','CASE NO ','ORDER NO ','LINE NO','PART NO _SUPPLY','PART NO _ORDER','H/K','PART NAME',
-                        'SUPPLY QTY','ORDER QTY','ACCEPT QTY','CLAIM QTY','CLAIM TYPE','CLAIM CODE','LOC','LIST PRICE',
-                        'NDP (UNIT)','ED (UNIT)','MAT VALUE','DEPOT S/C','VOR S/C','OTHER CHARGES','STAX(%)','CTAX(%)',
-                        'ITAX(%)','TAX(%)','HSN CODE','TAX AMT','FRT/INS','SGST AMT','CGST AMT','IGST AMT','COMP CESS AMT',
-                        'LANDED COST','ORDER DATE','RECEIVING DATE','STATUS']
-                df = read_file(file_path, header=1)
-                #df = read_file(file_path, header=2)
-                try:
-                  df.columns = cols[:df.shape[1]]
-                except:
-                  df = pd.concat(pd.read_html(file_path, header=1),ignore_index=True)
-                  
-                if df is not None and not df.empty:
-                  #  df.columns = cols[:df.shape[1]]
-                    df['__source_file__'] = file
-                    df['Brand'] = brand
-                    df['Dealer'] = dealer
-                    df['Location'] = location
-                    Receving_Today_Detail.append(df)
-                continue
+        # RECEIVING TODAY DETAIL (header=1)
+        if kind == "receiving today detail":
+            df = parsed
+            if df is not None and not df.empty:
+                Receving_Today_Detail.append(label_frame(df, brand, dealer, location, file))
+            continue
 
-            # TRANSFER LIST (header=1)
-            if fl.startswith("transfer list"):
-                cols = ['TRANSFER NO','REQ.DATE','REQ.TIME','SEND DATE','SEND.TIME','RECE.DATE','RECE.TIME','REQU.DEALER',
-                        'SEND DEALER','ITEM_REQ','ITEM_SEND','QUANTITY_REQ','QUANTITY_SEND','AMOUNT','AMOUNT2','TAXABLE AMT',
-                        'SGST AMT','CGST AMT','IGST AMT','COMP CESS AMT','STATUS']
-                df = read_file(file_path, header=1)
-                if df is not None and not df.empty:
-                    df.columns = cols[:df.shape[1]]
-                    df['__source_file__'] = file
-                    df['Brand'] = brand
-                    df['Dealer'] = dealer
-                    df['Location'] = location
-                    Transfer_List.append(df)
-                continue
+        # TRANSFER DETAIL (header=0)
+        if kind == "transfer detail":
+            df = parsed
+            if df is not None and not df.empty:
+                Transfer_Detail.append(label_frame(df, brand, dealer, location, file))
+            continue
 
-            # TRANSFER DETAIL (header=0)
-            if fl.startswith("transfer detail"):
-                df = read_file(file_path, header=0)
-                if df is not None and not df.empty:
-                    df['__source_file__'] = file
-                    df['Brand'] = brand
-                    df['Dealer'] = dealer
-                    df['Location'] = location
-                    Transfer_Detail.append(df)
-                continue
+    # ---------- REPORT GEN ----------
+    frames_for_oem = []
+
+    # BO LIST → last 90 days; compute transit/T/F/Remark
+    if BO_LIST:
+        oem = concat_frames(BO_LIST)
+        cutoff_90 = (datetime.today() - timedelta(days=90)).date()
+        oem_work = oem[oem['PO DATE'].dt.date >= cutoff_90].copy()
+
+        transit_remarks(oem_work)
+        oem_workf = oem_work[['Brand', 'Dealer', 'Location', 'ORDER NO', 'PART NO_CURRENT', 'PO DATE', 'transit', 'Remark']].copy()
+        oem_workf.rename(columns={
+            'ORDER NO': 'OrderNumber',
+            'PART NO_CURRENT': 'PartNumber',
+            'PO DATE': 'OrderDate',
+            'transit': 'POQty'
+        }, inplace=True)
+        frames_for_oem.append(oem_workf)
+
+    # Receiving Pending Detail → last 60 days
+    if Receving_Pending_Detail:
+        rpd = concat_frames(Receving_Pending_Detail)
+        cutoff_60 = (datetime.today() - timedelta(days=60)).date()
+        rpdw = rpd[rpd['ORDER DATE'].dt.date >= cutoff_60].copy()
+        rpdw = rpdw[['Brand', 'Dealer', 'Location', 'ORDER NO ', 'PART NO _SUPPLY', 'ORDER DATE', 'ACCEPT QTY', '__source_file__']]
+        rpdw.rename(columns={
+            'ORDER NO ': 'OrderNumber',
+            'PART NO _SUPPLY': 'PartNumber',
+            'ORDER DATE': 'OrderDate',
+            'ACCEPT QTY': 'POQty',
+            '__source_file__': 'Remark'
+        }, inplace=True)
+        frames_for_oem.append(rpdw)
+
+    # Receiving Today Detail → last 60 days
+    if Receving_Today_Detail:
+        rtd = concat_frames(Receving_Today_Detail)
+        cutoff_60 = (datetime.today() - timedelta(days=60)).date()
+        rtdw = rtd[rtd['ORDER DATE'].dt.date >= cutoff_60].copy()
+        rtdw = rtdw[['Brand', 'Dealer', 'Location', 'ORDER NO ', 'PART NO _SUPPLY', 'ORDER DATE', 'ACCEPT QTY', '__source_file__']]
+        rtdw.rename(columns={
+            'ORDER NO ': 'OrderNumber',
+            'PART NO _SUPPLY': 'PartNumber',
+            'ORDER DATE': 'OrderDate',
+            'ACCEPT QTY': 'POQty',
+            '__source_file__': 'Remark'
+        }, inplace=True)
+        frames_for_oem.append(rtdw)
+
+    # Save OEM_{...}.xlsx (Hyundai unified)
+    if frames_for_oem:
+        key_oem = f"OEM_{brand}_{dealer}_{location}.{fmt}"
+        oem_final = concat_frames(frames_for_oem)
+    
+        # CLEAN: remove - and . safely
+        oem_final['PartNumber'] = (
+            oem_final['PartNumber'].astype(str).str.strip().str.replace(r'[\-.]', '', regex=True)
+        )
+    
+        oem_final['OEMInvoiceNo'] = ''
+        oem_final['OEMInvoiceDate'] = ''
+        oem_final['OEMInvoiceQty'] = ''
+        oem_final['OrderDate'] = pd.to_datetime(oem_final['OrderDate'], errors='coerce').dt.strftime('%d %b %Y')
+    
+        # Preview for UI & for dealerwise ZIP
+        previews[key_oem] = compact_frame(oem_final.copy())
+    
+        # Build Excel with two sheets: Summary (Pls Check) + FullData; Summary is the active sheet.
+        # Other formats hold one frame per file: the summary is written as its own output.
+        summary = oem_summary(oem_final)
+        if fmt == "xlsx":
+            outputs = {key_oem: [('Check Order status', summary), ('sheet1', oem_final.reset_index(drop=True))]}
+        else:
+            previews[status_name(key_oem)] = summary
+            outputs = {status_name(key_oem): [('Check Order status', summary)],
+                       key_oem: [('sheet1', oem_final.reset_index(drop=True))]}
+        for name, sheets in outputs.items():
+            files[name], seconds = timed_output(store.timings, label, name, sheets, xlsx_backend, fmt)
+            excel_seconds += seconds
+
+    
+    # Save Stock_{...}.xlsx
+    if Stock_data:
+        key_stock = f"Stock_{brand}_{dealer}_{location}.{fmt}"
+        stock_df = concat_frames(Stock_data)
+
+        # Final selection
+        stock_final = stock_df[['Brand', 'Dealer', 'Location', 'PART NO ?', 'ON-HAND']].rename(
+            columns={'PART NO ?': 'Partnumber', 'ON-HAND': 'Qty'}
+        )
+        previews[key_stock] = compact_frame(stock_final.copy())
+        files[key_stock], seconds = timed_output(store.timings, label, key_stock, [("Sheet1", stock_final)],
+                                                 xlsx_backend, fmt)
+        excel_seconds += seconds
+
+    # Pending (from Transfer_Detail minimal subset) -> Pending_{...}.xlsx
+    if Transfer_Detail:
+        tr = concat_frames(Transfer_Detail)
+        # Only add if expected columns exist
+        needed_cols = {'PART NO ?', 'QUANTITY'}
+        if needed_cols.issubset(set(tr.columns)):
+            tr_Df = tr[['Brand','Dealer','Location','PART NO ?','QUANTITY']].copy()
+            tr_Df['PART NO ?'] = tr_Df['PART NO ?'].astype(str).str.strip()
+            tr_Df.rename(columns={'PART NO ?':'PartNumber','QUANTITY':'Qty'}, inplace=True)
+            key_pending = f"Pending_{brand}_{dealer}_{location}.{fmt}"
+            previews[key_pending] = compact_frame(tr_Df.copy())
+            files[key_pending], seconds = timed_output(store.timings, label, key_pending, [("Sheet1", tr_Df)],
+                                                       xlsx_backend, fmt)
+            excel_seconds += seconds
+
+    # report computation (incl. the parses it triggered), the workbooks are timed separately
+    store.timings.add("reports", time.perf_counter() - t0 - excel_seconds, label,
+                      rows=sum(len(df) for df in previews.values()))
+    return previews, files, validation_errors
+
+def _location_worker(brand, dealer, location, location_path, select_categories, frames, source, index,
+                     xlsx_backend, parse_cache=None, output_format=None, date_formats=None):
+    # Runs in a worker process: frames are whatever the parent store already parsed
+    # for this location; anything missing (e.g. Stock) is parsed here from the same source,
+    # starting from the date formats the parent detected in this upload.
+    store = FrameStore(frames, source, {location_path: index}, parse_cache, date_formats=date_formats)
+    result = build_location_reports(brand, dealer, location, location_path, select_categories, store,
+                                    xlsx_backend, output_format)
+    return (result, store.formats, parse_cache.counts() if parse_cache is not None else None,
+            store.timings.records)
+
+def _report_progress(progress_bar, status_text, fraction, message):
+    # either widget may be None when running headless (hyundai_cli.py)
+    if progress_bar is not None:
+        progress_bar.progress(fraction)
+    if status_text is not None:
+        status_text.text(message)
+
+def location_results(all_locations, total_locations, progress_bar, status_text, select_categories,
+                     store=None, workers=1, xlsx_backend=None, reports=None, output_format=None):
+    """
+    build_location_reports for every location: [({name: StoredReport}, validation_errors)]
+    in all_locations order, whichever worker finished first.
+    progress_bar/status_text: objects with .progress(fraction) / .text(message), or None.
+    reports: the run's ReportStore; each location's outputs count against its memory
+    budget as soon as they are built (list them with merge_results).
+    """
+    # every file is parsed once per upload; the store is shared with the validators
+    store = store if store is not None else FrameStore()
+    reports = reports if reports is not None else ReportStore()
+
+    # results are kept in all_locations order so the UI/ZIP order does not depend on workers
+    results = [None] * len(all_locations)
+
+    if workers and workers > 1 and len(all_locations) > 1:
+        # spawn: forking a threaded Streamlit server is not safe
+        ctx = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(all_locations)), mp_context=ctx)
+        try:
+            futures = {}
+            for i, (brand, dealer, location, location_path) in enumerate(all_locations):
+                fut = pool.submit(_location_worker, brand, dealer, location, location_path,
+                                  select_categories, store.cached(location_path), store.source,
+                                  store.index(location_path), xlsx_backend, store.parse_cache, output_format,
+                                  store.date_formats)
+                futures[fut] = i
+                store.release(location_path)
+            for done, fut in enumerate(as_completed(futures), start=1):
+                i = futures[fut]
+                (loc_previews, loc_files, loc_errors), formats, cache_counts, timing_records = fut.result()
+                results[i] = (reports.wrap(loc_previews, loc_files), loc_errors)
+                store.formats.update(formats)
+                store.timings.extend(timing_records)
+                if cache_counts:
+                    store.parse_cache.merge_counts(cache_counts)
+                _report_progress(progress_bar, status_text, done / max(total_locations, 1),
+                                 f"Generated reports for {all_locations[i][2]} ({done}/{total_locations})...")
+        except BaseException:
+            # cancelled job (jobs.JobCancelled from a progress update) or a failed location: drop
+            # the locations not started yet and return now; running ones finish in the background
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+    else:
+        for i, (brand, dealer, location, location_path) in enumerate(all_locations):
+            _report_progress(progress_bar, status_text, (i + 1) / max(total_locations, 1),
+                             f"Generating reports for {location} ({i+1}/{total_locations})...")
+            loc_previews, loc_files, loc_errors = build_location_reports(brand, dealer, location, location_path,
+                                                                         select_categories, store, xlsx_backend,
+                                                                         output_format)
+            results[i] = (reports.wrap(loc_previews, loc_files), loc_errors)
+            # last stage for this location: free its parsed frames
+            store.release(location_path)
+    return results
+
+def merge_results(results, reports=None):
+    """List per-location ({name: StoredReport}, validation_errors) in order; returns (reports, validation_errors)."""
+    reports = reports if reports is not None else ReportStore()
+    validation_errors = []
+    for loc_reports, loc_errors in results:
+        for name, report in loc_reports.items():
+            reports.add(name, report)
+        validation_errors.extend(loc_errors)
+    return reports, validation_errors
+
+def generate_reports(all_locations, total_locations, progress_bar, status_text, select_categories,
+                     store=None, workers=1, xlsx_backend=None, reports=None, output_format=None):
+    """
+    Build the reports of every location. Returns (reports, validation_errors): a
+    ReportStore (`reports` or a new one) listing the outputs in all_locations order;
+    no Streamlit output is rendered.
+    """
+    reports = reports if reports is not None else ReportStore()
+    return merge_results(location_results(all_locations, total_locations, progress_bar, status_text,
+                                           select_categories, store, workers, xlsx_backend, reports,
+                                           output_format), reports)
 
-        # ---------- REPORT GEN ----------
-        frames_for_oem = []
-
-        # BO LIST → last 90 days; compute transit/T/F/Remark
-        if BO_LIST:
-            oem = pd.concat(BO_LIST, ignore_index=True)
-            # Date parse (supports 2-digit/4-digit year strings)
-            oem['PO DATE'] = pd.to_datetime(oem['PO DATE'], errors='coerce')
-            cutoff_90 = (datetime.today() - timedelta(days=90)).date()
-            oem_work = oem[oem['PO DATE'].dt.date >= cutoff_90].copy()
-
-            # numerics
-            for c in ['B/O', 'PROCESSING_ALLOCATION', 'PROCESSING_ON-PICK', 'PROCESSING_ON-PACK',
-                      'PROCESSING_PACKED', 'PROCESSING_INVOICE', 'PROCESSING_SHIPPEO', 'QUANTITY_CURRENT']:
-                if c in oem_work.columns:
-                    oem_work[c] = to_num(oem_work[c])
-
-            oem_work['transit'] = (
-                oem_work.get('B/O', 0)
-                + oem_work.get('PROCESSING_ALLOCATION', 0)
-                + oem_work.get('PROCESSING_ON-PICK', 0)
-                + oem_work.get('PROCESSING_ON-PACK', 0)
-                + oem_work.get('PROCESSING_PACKED', 0)
-                + oem_work.get('PROCESSING_INVOICE', 0)
-            )
-            oem_work['T/F'] = oem_work.get('QUANTITY_CURRENT', 0).eq(oem_work.get('PROCESSING_SHIPPEO', 0))
-
-            def _remark(r):
-                if r['transit'] == 0.0 and bool(r['T/F']) is True:
-                    return 'Ok'
-                if r['transit'] > 0.0 and bool(r['T/F']) is False:
-                    return 'Ok'
-                if r['transit'] == 0.0 and bool(r['T/F']) is False:
-                    return 'Pls Check'
-                return None
-
-            oem_work['Remark'] = oem_work.apply(_remark, axis=1)
-            oem_work['transit'] = oem_work.apply(lambda row:row['QUANTITY_CURRENT'] if row['Remark']=='Pls Check' else row['transit'] ,axis=1)
-            oem_workf = oem_work[['Brand', 'Dealer', 'Location', 'ORDER NO', 'PART NO_CURRENT', 'PO DATE', 'transit', 'Remark']].copy()
-            oem_workf.rename(columns={
-                'ORDER NO': 'OrderNumber',
-                'PART NO_CURRENT': 'PartNumber',
-                'PO DATE': 'OrderDate',
-                'transit': 'POQty'
-            }, inplace=True)
-            frames_for_oem.append(oem_workf)
-
-        # Receiving Pending Detail → last 60 days
-        if Receving_Pending_Detail:
-            rpd = pd.concat(Receving_Pending_Detail, ignore_index=True)
-            rpd['ORDER DATE'] = pd.to_datetime(rpd['ORDER DATE'], errors='coerce')
-            cutoff_60 = (datetime.today() - timedelta(days=60)).date()
-            rpdw = rpd[rpd['ORDER DATE'].dt.date >= cutoff_60].copy()
-            rpdw = rpdw[['Brand', 'Dealer', 'Location', 'ORDER NO ', 'PART NO _SUPPLY', 'ORDER DATE', 'ACCEPT QTY', '__source_file__']]
-            rpdw.rename(columns={
-                'ORDER NO ': 'OrderNumber',
-                'PART NO _SUPPLY': 'PartNumber',
-                'ORDER DATE': 'OrderDate',
-                'ACCEPT QTY': 'POQty',
-                '__source_file__': 'Remark'
-            }, inplace=True)
-            frames_for_oem.append(rpdw)
-
-        # Receiving Today Detail → last 60 days
-        if Receving_Today_Detail:
-            rtd = pd.concat(Receving_Today_Detail, ignore_index=True)
-            rtd['ORDER DATE'] = pd.to_datetime(rtd['ORDER DATE'], errors='coerce')
-            cutoff_60 = (datetime.today() - timedelta(days=60)).date()
-            rtdw = rtd[rtd['ORDER DATE'].dt.date >= cutoff_60].copy()
-            rtdw = rtdw[['Brand', 'Dealer', 'Location', 'ORDER NO ', 'PART NO _SUPPLY', 'ORDER DATE', 'ACCEPT QTY', '__source_file__']]
-            rtdw.rename(columns={
-                'ORDER NO ': 'OrderNumber',
-                'PART NO _SUPPLY': 'PartNumber',
-                'ORDER DATE': 'OrderDate',
-                'ACCEPT QTY': 'POQty',
-                '__source_file__': 'Remark'
-            }, inplace=True)
-            frames_for_oem.append(rtdw)
-
-        # Save OEM_{...}.xlsx (Hyundai unified)
-        # if frames_for_oem:
-        #     key_oem = f"OEM_{brand}_{dealer}_{location}.xlsx"
-        #     oem_final = pd.concat(frames_for_oem, ignore_index=True)
-        #     oem_final['PartNumber']  = oem_final['PartNumber'].astype(str).str.strip().replace('-','').replace('.','')
-            
-        #     oem_final['OEMInvoiceNo']=''
-        #     oem_final['OEMInvoiceDate']=''
-        #     oem_final['OEMInvoiceQty']=''
-        #     oem_final['OrderDate'] = pd.to_datetime(oem_final['OrderDate'], errors='coerce')
-        #     oem_final['OrderDate'] = oem_final['OrderDate'].dt.strftime('%d %b %Y')
-        #     oem_c = oem_final[oem_final['Remark']=='Pls Check'][['Location','OrderNumber']].drop_duplicates()
-        #     # Preview for UI & for dealerwise ZIP
-        #     previews[key_oem] = oem_final.copy()
-
-        #     # Build Excel with two sheets (sheet1: summary of "Pls Check", sheet2: full)
-        #     excel_buffer = io.BytesIO()
-        #     with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-        #         #oem_c = oem_final[oem_final['Remark']=='Pls Check'][['Location','OrderNumber']].drop_duplicates()
-        #         oem_c.reset_index(drop=True).to_excel(writer, sheet_name='sheet1', index=False)
-        #         oem_final.reset_index(drop=True).to_excel(writer, sheet_name='sheet2', index=False)
-        #     files[key_oem] = excel_buffer.getvalue()
-
-        # Save OEM_{...}.xlsx (Hyundai unified)
-        if frames_for_oem:
-            key_oem = f"OEM_{brand}_{dealer}_{location}.xlsx"
-            oem_final = pd.concat(frames_for_oem, ignore_index=True)
-        
-            # CLEAN: remove - and . safely
-            oem_final['PartNumber'] = (
-                oem_final['PartNumber'].astype(str).str.strip().str.replace(r'[\-.]', '', regex=True)
-            )
-        
-            oem_final['OEMInvoiceNo'] = ''
-            oem_final['OEMInvoiceDate'] = ''
-            oem_final['OEMInvoiceQty'] = ''
-            oem_final['OrderDate'] = pd.to_datetime(oem_final['OrderDate'], errors='coerce').dt.strftime('%d %b %Y')
-        
-            # Preview for UI & for dealerwise ZIP
-            previews[key_oem] = oem_final.copy()
-        
-            # Build Excel with two sheets: Summary (Pls Check) + FullData
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                summary = (
-                    oem_final.loc[oem_final['Remark'].astype(str).str.strip().str.lower().eq('pls check'),
-                                  ['Location', 'OrderNumber']]
-                            .drop_duplicates()
-                )
-                # keep a visible row even if empty (optional)
-                if summary.empty:
-                    summary = pd.DataFrame([{'Location': '—', 'OrderNumber': 'No "Pls Check" rows'}])
-        
-                summary.to_excel(writer, sheet_name='Check Order status', index=False)
-                oem_final.reset_index(drop=True).to_excel(writer, sheet_name='sheet1', index=False)
-        
-                # make Summary the active sheet
-                writer.book.active = 0
-        
-            files[key_oem] = excel_buffer.getvalue()
-
-        
-        # Save Stock_{...}.xlsx
-        if Stock_data:
-            key_stock = f"Stock_{brand}_{dealer}_{location}.xlsx"
-            stock_df = pd.concat(Stock_data, ignore_index=True)
-            #stock_df['PART NO ?']  = stock_df['PART NO ?'].astype(str).str.strip().replace('.','').replace('-','')
-            stock_df['PART NO ?'] = (stock_df['PART NO ?'].astype(str).str.strip().str.replace('.', '', regex=False).str.replace('-', '', regex=False))
-            stock_df['PART TYPE'] = stock_df['PART TYPE'].astype(str).str.strip()
-            if select_categories == ['Spares']:
-                stock_df = stock_df[stock_df['PART TYPE'].isin(['X', 'Y'])]
-            elif select_categories == ['Accessories']:
-                stock_df = stock_df[stock_df['PART TYPE'] == 'A']
-            elif set(select_categories) == {'Spares', 'Accessories'}:
-                stock_df = stock_df[stock_df['PART TYPE'].isin(['X', 'Y', 'A'])]
-
-            # Final selection
-            stock_final = stock_df[['Brand', 'Dealer', 'Location', 'PART NO ?', 'ON-HAND']].rename(
-                columns={'PART NO ?': 'Partnumber', 'ON-HAND': 'Qty'}
-            )
-            previews[key_stock] = stock_final.copy()
-            buf = io.BytesIO()
-            with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-                stock_final.to_excel(writer, index=False, sheet_name="Sheet1")
-            files[key_stock] = buf.getvalue()
-
-        # Pending (from Transfer_Detail minimal subset) -> Pending_{...}.xlsx
-        if Transfer_Detail:
-            tr = pd.concat(Transfer_Detail, ignore_index=True)
-            # Only add if expected columns exist
-            needed_cols = {'PART NO ?', 'QUANTITY'}
-            if needed_cols.issubset(set(tr.columns)):
-                tr_Df = tr[['Brand','Dealer','Location','PART NO ?','QUANTITY']].copy()
-                tr_Df['PART NO ?'] = tr_Df['PART NO ?'].astype(str).str.strip()
-                tr_Df.rename(columns={'PART NO ?':'PartNumber','QUANTITY':'Qty'}, inplace=True)
-                key_pending = f"Pending_{brand}_{dealer}_{location}.xlsx"
-                previews[key_pending] = tr_Df.copy()
-                buf = io.BytesIO()
-                with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-                    tr_Df.to_excel(writer, index=False, sheet_name="Sheet1")
-                files[key_pending] = buf.getvalue()
+def process_files(validation_errors, all_locations, start_date, end_date, total_locations,
+                  progress_bar, status_text, select_categories, store=None, workers=1, xlsx_backend=None,
+                  output_format=None):
+    reports, errors = generate_reports(all_locations, total_locations, progress_bar, status_text,
+                                       select_categories, store, workers, xlsx_backend, output_format=output_format)
+    validation_errors.extend(errors)
+    render_reports(validation_errors, reports, xlsx_backend=xlsx_backend)
+
+def render_reports(validation_errors, reports, combined_zip=None, xlsx_backend=None):
+    """
+    Streamlit output: issues, per-location downloads and the dealer-wise combined ZIP.
+    reports: ReportStore; only the previews are rendered, workbooks are read when downloaded.
+    combined_zip: ZIP bytes or a zero-argument callable returning them; when None the
+    ZIP is built lazily from the reports on download.
+    """
+    import streamlit as st
 
     # ---------- UI ----------
     if validation_errors:
@@ -461,11 +471,12 @@ def process_files(validation_errors, all_locations, start_date, end_date, total_
     st.success("🎉 Reports generated successfully!")
     st.subheader("📥 Download Reports")
 
-    # Build sections from available file names (files dict is source of truth for downloads)
+    # Build sections from the outputs that have a workbook (source of truth for downloads)
+    names = [k for k in reports if reports.report(k).has_workbook]
     report_types = {
-        'OEM':      [k for k in files.keys() if k.startswith('OEM_')],
-        'Stock':    [k for k in files.keys() if k.startswith('Stock_')],
-        'Transfer': [k for k in files.keys() if k.startswith(('Transfer_','Pending_'))],
+        'OEM':      [k for k in names if k.startswith(('OEM_', f'{OEM_STATUS}_'))],
+        'Stock':    [k for k in names if k.startswith('Stock_')],
+        'Transfer': [k for k in names if k.startswith(('Transfer_','Pending_'))],
     }
 
     for report_type, names in report_types.items():
@@ -476,106 +487,38 @@ def process_files(validation_errors, all_locations, start_date, end_date, total_
                 st.markdown(f"### 📄 {name}")
 
                 # Show preview if we have it
-                df_preview = previews.get(name)
+                df_preview = reports.preview(name)
                 if df_preview is not None and not df_preview.empty:
-                    st.dataframe(df_preview.head(5))
+                    st.dataframe(df_preview)
                 else:
                     st.info("No preview available.")
 
-                # Download button (bytes)
-                blob = files.get(name)
-                if blob:
+                # Download button: the workbook is read (back from disk if spilled) on click
+                report = reports.report(name)
+                if report.has_workbook:
+                    fmt = file_format(name) or "xlsx"
                     st.download_button(
-                        label="⬇ Download Excel",
-                        data=blob,
+                        label="⬇ Download Excel" if fmt == "xlsx" else f"⬇ Download {fmt}",
+                        data=report.blob,
                         file_name=name,
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        mime=MIME_TYPES[fmt],
                         key=f"dl_{name}",
                     )
                 else:
                     st.warning("⚠ Download content missing for this file.")
 
     # ---------- Combined ZIP per (report_type, brand, dealer) using previews (DataFrames) ----------
-    # grouped_data = defaultdict(list)
-    # for file_name, df in previews.items():
-    #     if df is None or df.empty:
-    #         continue
-    #     parts = file_name.replace(".xlsx", "").split("_")
-    #     if len(parts) >= 4:
-    #         rep, br, dlr = parts[0], parts[1], parts[2]
-    #         loc_part = "_".join(parts[3:])
-    #         if "Location" not in df.columns:
-    #             df = df.copy()
-    #             df["Location"] = loc_part
-    #         grouped_data[(rep, br, dlr)].append(df)
-    #     else:
-    #         st.warning(f"❗ Invalid file name format: {file_name}")
-
-    # if grouped_data:
-    #     zip_buffer = io.BytesIO()
-    #     with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-    #         for (rep, br, dlr), df_list in grouped_data.items():
-    #             combined_df = pd.concat(df_list, ignore_index=True)
-    #             excel_buffer = io.BytesIO()
-    #             with pd.ExcelWriter(excel_buffer, engine="openpyxl") as writer:
-    #                 combined_df.to_excel(writer, sheet_name="Sheet1", index=False)
-    #             output_filename = f"{rep}_{br}_{dlr}.xlsx"
-    #             zipf.writestr(output_filename, excel_buffer.getvalue())
-
-    #     st.download_button(
-    #         label="📦 Download Combined Dealer Reports ZIP",
-    #         data=zip_buffer.getvalue(),
-    #         file_name="Combined_Dealerwise_Reports.zip",
-    #         mime="application/zip",
-    #     )
-    # else:
-    #     st.info("ℹ No reports available to download.")
-    #     st.warring("Pls check Folder Structure")
-    # ---------- Combined ZIP per (report_type, brand, dealer) using previews (DataFrames) ----------
-    grouped_data = defaultdict(list)
-    for file_name, df in previews.items():
-        if df is None or df.empty:
-            continue
-        parts = file_name.replace(".xlsx", "").split("_")
-        if len(parts) >= 4:
-            rep, br, dlr = parts[0], parts[1], parts[2]
-            loc_part = "_".join(parts[3:])
-            if "Location" not in df.columns:
-                df = df.copy()
-                df["Location"] = loc_part
-            grouped_data[(rep, br, dlr)].append(df)
-        else:
-            st.warning(f"❗ Invalid file name format: {file_name}")
-    
+    grouped_data, invalid_names = dealer_groups(reports)
+    for file_name in invalid_names:
+        st.warning(f"❗ Invalid file name format: {file_name}")
+
     if grouped_data:
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for (rep, br, dlr), df_list in grouped_data.items():
-                combined_df = pd.concat(df_list, ignore_index=True)
-    
-                excel_buffer = io.BytesIO()
-                with pd.ExcelWriter(excel_buffer, engine="openpyxl") as writer:
-                    if rep == "OEM":
-                        summary = (
-                            combined_df.loc[combined_df['Remark'].astype(str).str.strip().str.lower().eq('pls check'),
-                                            ['Location', 'OrderNumber']]
-                                       .drop_duplicates()
-                        )
-                        if summary.empty:
-                            summary = pd.DataFrame([{'Location': '—', 'OrderNumber': 'No "Pls Check" rows'}])
-    
-                        summary.to_excel(writer, sheet_name="Check Order status", index=False)
-                        combined_df.to_excel(writer, sheet_name="sheet1", index=False)
-                        writer.book.active = 0
-                    else:
-                        combined_df.to_excel(writer, sheet_name="Sheet1", index=False)
-    
-                output_filename = f"{rep}_{br}_{dlr}.xlsx"
-                zipf.writestr(output_filename, excel_buffer.getvalue())
-    
+        # built only when the user clicks (Streamlit calls the callable on download)
+        if combined_zip is None:
+            combined_zip = lambda: build_dealer_zip(reports, xlsx_backend)
         st.download_button(
             label="📦 Download Combined Dealer Reports ZIP",
-            data=zip_buffer.getvalue(),
+            data=combined_zip,
             file_name="Combined_Dealerwise_Reports.zip",
             mime="application/zip",
         )
@@ -583,30 +526,88 @@ def process_files(validation_errors, all_locations, start_date, end_date, total_
         st.info("ℹ No reports available to download.")
         st.warning("Pls check Folder Structure")  # (fix typo from st.warring -> st.warning)
 
+def dealer_groups(reports):
+    """
+    Group per-location outputs with a non-empty frame by (report_type, brand, dealer) for
+    the combined ZIP. Returns ({(rep, br, dlr): [file_name]}, invalid_file_names); only
+    the previews are looked at, nothing is read back or serialized. OEMStatus_ outputs
+    are not grouped: a dealer's summary is rebuilt from its combined OEM frame.
+    """
+    grouped_data = defaultdict(list)
+    invalid_names = []
+    for file_name in reports:
+        df = reports.preview(file_name)
+        if df is None or df.empty or file_name.startswith(f"{OEM_STATUS}_"):
+            continue
+        parts = output_stem(file_name).split("_")
+        if len(parts) >= 4:
+            rep, br, dlr = parts[0], parts[1], parts[2]
+            grouped_data[(rep, br, dlr)].append(file_name)
+        else:
+            invalid_names.append(file_name)
+    return grouped_data, invalid_names
+
+def build_dealer_zip(reports, xlsx_backend=None, cache=None, versions=None, timings=None, out=None):
+    """
+    Combined ZIP per (report_type, brand, dealer) built from the output frames in `reports`
+    (ReportStore), read back one dealer at a time, in the output format of its locations'
+    files. A dealer with a single location reuses that location's file(s) (same frame,
+    same sheets), streamed into the ZIP, so only multi-location dealers are serialized again.
+    cache/versions: optional get/put cache and {file_name: location fingerprint}; the files
+    of a dealer whose locations all kept their fingerprint are taken from the cache.
+    timings: optional timings.StageTimings; every file written is recorded as "excel".
+    out: file path or binary file object to write the ZIP to instead of returning its bytes.
+    Returns the ZIP bytes (or `out`), or None if there is nothing to combine.
+    """
+    grouped_data, _ = dealer_groups(reports)
+    if not grouped_data:
+        return None
+
+    zip_buffer = io.BytesIO() if out is None else out
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for (rep, br, dlr), names in grouped_data.items():
+            fmt = file_format(names[0]) or "xlsx"
+            output_filename = f"{rep}_{br}_{dlr}.{fmt}"
+            # OEM outside xlsx: the "Check Order status" summary is a file of its own
+            split_status = rep == "OEM" and fmt != "xlsx"
+            if len(names) == 1 and reports.report(names[0]).has_workbook:
+                copies = {output_filename: names[0]}
+                if split_status and status_name(names[0]) in reports:
+                    copies = {status_name(output_filename): status_name(names[0]), **copies}
+                for filename, name in copies.items():
+                    with reports.open(name) as src, zipf.open(filename, "w") as dst:
+                        shutil.copyfileobj(src, dst)
+                continue
 
+            group_key = None
+            if cache is not None and versions and all(n in versions for n in names):
+                group_key = ("dealer-outputs", rep, br, dlr, tuple(versions[n] for n in names), fmt, xlsx_backend)
+                blobs = cache.get(group_key)
+                if blobs is not None:
+                    for filename, blob in blobs.items():
+                        zipf.writestr(filename, blob)
+                    continue
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+            df_list = []
+            for file_name in names:
+                df = reports.frame(file_name)
+                if "Location" not in df.columns:
+                    df = df.copy()
+                    df["Location"] = "_".join(output_stem(file_name).split("_")[3:])
+                df_list.append(df)
+            combined_df = concat_frames(df_list)
+
+            if split_status:
+                outputs = {status_name(output_filename): [("Check Order status", oem_summary(combined_df))],
+                           output_filename: [("sheet1", combined_df)]}
+            elif rep == "OEM":
+                outputs = {output_filename: [("Check Order status", oem_summary(combined_df)), ("sheet1", combined_df)]}
+            else:
+                outputs = {output_filename: [("Sheet1", combined_df)]}
+            blobs = {}
+            for filename, sheets in outputs.items():
+                blobs[filename], _ = timed_output(timings, None, filename, sheets, xlsx_backend, fmt)
+                zipf.writestr(filename, blobs[filename])
+            if group_key is not None:
+                cache.put(group_key, blobs)
+    return zip_buffer.getvalue() if out is None else out
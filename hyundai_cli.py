@@ -0,0 +1,216 @@
+"""
+Headless batch runner: the same checks and reports as Hyundaiapp.py, without Streamlit.
+
+    python hyundai_cli.py uploads/*.zip --out reports --start 2025-01-01 --end 2025-02-28 \\
+        --period Week --categories Spares --jobs 4
+
+Each input (an upload ZIP or an extracted brand/dealer/location folder) gets its own
+output folder <out>/<input name>/ with the per-location workbooks (or Parquet / csv.gz
+files with --output-format), the dealer-wise Combined_Dealerwise_Reports.zip, the
+validation logs, per-file/per-stage timings (timings.csv / timings.json) and a summary.json.
+
+Exit status: 0 all reports generated, 1 an input failed or was blocked by the
+quantity reconciliation, 2 an input was held back by non-blocking validation
+issues (missing files / periods) and --continue-anyway was not given.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import shutil
+import time
+import zipfile
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from frame_store import FrameStore, DirectorySource, ZipSource
+from hrpt import generate_reports, build_dealer_zip
+from validation import PERIOD_TYPES, list_locations, validate_upload
+from incremental import validate_incremental, generate_incremental
+from result_cache import DiskResultCache
+from writers import WRITER_BACKENDS, DEFAULT_BACKEND, DEFAULT_FORMAT, available_formats
+from parse_cache import ParseCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_MB
+from timings import stage_summary
+from report_store import DEFAULT_MEMORY_MB, ReportStore
+
+log = logging.getLogger("hyundai_cli")
+
+CATEGORIES = ['Spares', 'Accessories', 'All']
+
+class _LogStatus:
+    """Stands in for Streamlit's status_text: progress messages go to the log."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def text(self, message):
+        log.info("%s: %s", self.name, message)
+
+def open_input(input_path):
+    """(source, all_locations) for an upload ZIP or an extracted brand/dealer/location tree."""
+    if os.path.isdir(input_path):
+        return DirectorySource(), list_locations(input_path)
+    if zipfile.is_zipfile(input_path):
+        # by path, so worker processes can re-open the archive
+        source = ZipSource(input_path)
+        return source, source.locations
+    raise ValueError(f"{input_path} is neither a ZIP file nor a folder")
+
+def _input_name(input_path):
+    name = os.path.basename(os.path.normpath(input_path))
+    return name[:-4] if name.lower().endswith(".zip") else name
+
+def run_upload(input_path, out_dir, start_date, end_date, period_type="Day", select_categories=("Spares",),
+               continue_anyway=False, workers=1, xlsx_backend=None, parse_cache=None, state_dir=None,
+               state_mb=2048, report_mb=DEFAULT_MEMORY_MB, output_format=None):
+    """
+    Validate one upload and, unless held back, write its reports under out_dir.
+    state_dir: keep per-location results there, so a later run only redoes changed locations.
+    report_mb: generated frames/workbooks held in memory before they are spilled to disk.
+    output_format: xlsx (default), parquet or csv.gz, per location and in the dealer ZIP.
+    Returns the summary dict that is also written to out_dir/summary.json.
+    """
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    name = _input_name(input_path)
+    summary = {"input": os.path.abspath(input_path), "status": None, "locations": 0, "reports": []}
+
+    cache_before = parse_cache.counts() if parse_cache is not None else None
+    source, all_locations = open_input(input_path)
+    try:
+        summary["locations"] = len(all_locations)
+        store = FrameStore(source=source, parse_cache=parse_cache)
+        period_days = PERIOD_TYPES.get(period_type, 1)
+        state = DiskResultCache(state_dir, state_mb * 1024 * 1024) if state_dir else None
+        if state is not None:
+            validation = validate_incremental(all_locations, start_date, end_date, period_days, store, state)
+            summary["reused_validations"] = validation["reused_locations"]
+        else:
+            validation = validate_upload(all_locations, start_date, end_date, period_days, store)
+        for key in ("missing_files", "period_validation_errors", "qty_mismatch_errors"):
+            summary[key] = validation[key]
+        if not validation["validation_log"].empty:
+            validation["validation_log"].to_csv(os.path.join(out_dir, "validation_issues_log.csv"), index=False)
+        if not validation["qty_mismatch_log"].empty:
+            validation["qty_mismatch_log"].to_csv(os.path.join(out_dir, "quantity_mismatch_log.csv"), index=False)
+
+        # same gate as the UI: hard block always, other issues unless "Continue Anyway"
+        if validation["qty_mismatch_errors"]:
+            summary["status"] = "blocked"
+            log.warning("%s: quantity reconciliation errors, processing halted", name)
+        elif (validation["missing_files"] or validation["period_validation_errors"]) and not continue_anyway:
+            summary["status"] = "validation_issues"
+            log.warning("%s: validation issues found, reports not generated (use --continue-anyway)", name)
+        else:
+            reports = ReportStore(report_mb * 1024 * 1024)
+            if state is not None:
+                reports, report_errors, versions, summary["reused_reports"] = generate_incremental(
+                    all_locations, None, _LogStatus(name), list(select_categories),
+                    store, state, workers=workers, xlsx_backend=xlsx_backend, reports=reports,
+                    output_format=output_format)
+            else:
+                reports, report_errors = generate_reports(
+                    all_locations, len(all_locations), None, _LogStatus(name), list(select_categories),
+                    store, workers=workers, xlsx_backend=xlsx_backend, reports=reports,
+                    output_format=output_format)
+                versions = None
+            written = []
+            for file_name in reports:
+                if reports.report(file_name).has_workbook:
+                    with reports.open(file_name) as src, open(os.path.join(out_dir, file_name), "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    written.append(file_name)
+            build_dealer_zip(reports, xlsx_backend, state, versions, store.timings,
+                             out=os.path.join(out_dir, "Combined_Dealerwise_Reports.zip"))
+            summary["status"] = "ok"
+            summary["reports"] = written
+            summary["report_errors"] = report_errors
+            summary["formats"] = store.format_counts()
+            summary["report_memory"] = reports.memory()
+        if parse_cache is not None:
+            summary["parse_cache"] = {k: v - cache_before[k] for k, v in parse_cache.counts().items()}
+        timings = store.timings.frame()
+        if not timings.empty:
+            timings.to_csv(os.path.join(out_dir, "timings.csv"), index=False)
+            timings.to_json(os.path.join(out_dir, "timings.json"), orient="records", indent=2)
+            summary["stage_seconds"] = stage_summary(timings).set_index("stage")["seconds"].to_dict()
+    finally:
+        source.close()
+
+    summary["seconds"] = round(time.perf_counter() - t0, 2)
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2, default=str)
+    log.info("%s: %s (%d locations, %d reports, %.1fs)", name, summary["status"], summary["locations"],
+             len(summary["reports"]), summary["seconds"])
+    return summary
+
+def _run_one(input_path, out_root, kwargs):
+    # batch entry point; failures are reported per input instead of stopping the batch
+    out_dir = os.path.join(out_root, _input_name(input_path))
+    try:
+        return run_upload(input_path, out_dir, **kwargs)
+    except Exception as e:
+        log.exception("%s: failed", input_path)
+        return {"input": os.path.abspath(input_path), "status": "failed", "error": str(e)}
+
+def _setup_logging(quiet):
+    logging.basicConfig(level=logging.WARNING if quiet else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+def main(argv=None):
+    today = datetime.today().date()
+    parser = argparse.ArgumentParser(description="Generate Hyundai reports without the Streamlit UI.")
+    parser.add_argument("inputs", nargs="+", help="upload ZIP files and/or extracted brand/dealer/location folders")
+    parser.add_argument("--out", required=True, help="output folder; one sub-folder per input")
+    parser.add_argument("--start", type=_parse_date, default=today - timedelta(days=59), help="YYYY-MM-DD")
+    parser.add_argument("--end", type=_parse_date, default=today, help="YYYY-MM-DD")
+    parser.add_argument("--period", choices=list(PERIOD_TYPES), default="Day")
+    parser.add_argument("--categories", nargs="+", choices=CATEGORIES, default=["Spares"])
+    parser.add_argument("--continue-anyway", action="store_true",
+                        help="generate reports despite missing files/periods (quantity mismatches still block)")
+    parser.add_argument("--xlsx-backend", choices=WRITER_BACKENDS, default=DEFAULT_BACKEND)
+    parser.add_argument("--output-format", choices=available_formats(), default=DEFAULT_FORMAT,
+                        help="parquet / csv.gz write the same frames without Excel, one file per frame")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes per input (locations in parallel)")
+    parser.add_argument("--jobs", type=int, default=1, help="inputs processed in parallel")
+    parser.add_argument("--parse-cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="on-disk cache of parsed input files, shared by every run")
+    parser.add_argument("--parse-cache-mb", type=int, default=DEFAULT_CACHE_MB, help="0 disables the parse cache")
+    parser.add_argument("--state-dir", help="keep per-location results here between runs and only "
+                                           "redo locations whose input files changed")
+    parser.add_argument("--state-mb", type=int, default=2048, help="size limit of --state-dir")
+    parser.add_argument("--report-mb", type=int, default=DEFAULT_MEMORY_MB,
+                        help="generated reports kept in memory per input; the rest is spilled to disk")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only log warnings and errors")
+    args = parser.parse_args(argv)
+
+    _setup_logging(args.quiet)
+    kwargs = dict(start_date=args.start, end_date=args.end, period_type=args.period,
+                  select_categories=args.categories, continue_anyway=args.continue_anyway,
+                  workers=args.workers, xlsx_backend=args.xlsx_backend, output_format=args.output_format,
+                  state_dir=args.state_dir, state_mb=args.state_mb, report_mb=args.report_mb,
+                  parse_cache=ParseCache(args.parse_cache_dir, args.parse_cache_mb * 1024 * 1024)
+                  if args.parse_cache_mb > 0 else None)
+
+    if args.jobs > 1 and len(args.inputs) > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(args.inputs)), mp_context=ctx,
+                                 initializer=_setup_logging, initargs=(args.quiet,)) as pool:
+            futures = [pool.submit(_run_one, p, args.out, kwargs) for p in args.inputs]
+            summaries = [f.result() for f in futures]
+    else:
+        summaries = [_run_one(p, args.out, kwargs) for p in args.inputs]
+
+    statuses = {s["status"] for s in summaries}
+    if statuses & {"failed", "blocked"}:
+        return 1
+    if "validation_issues" in statuses:
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
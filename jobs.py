@@ -0,0 +1,164 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# ---------------- Background Jobs ---------------- #
+# Uploads are processed on a server-wide pool instead of inside the Streamlit script run.
+# At most max_jobs run at once, and a job is only admitted while the uploads already
+# running stay under max_bytes (a larger upload waits until it can run alone). Each
+# session has at most one job and queued jobs start in submission order, so concurrent
+# users take turns instead of each running a full pipeline at the same time.
+MAX_JOBS = int(os.environ.get("HYUNDAI_MAX_JOBS", "2"))
+MAX_QUEUED_JOBS = int(os.environ.get("HYUNDAI_MAX_QUEUED_JOBS", "20"))
+MAX_JOB_UPLOAD_MB = int(os.environ.get("HYUNDAI_JOB_UPLOAD_MB", "400"))
+KEEP_SECONDS = 3600  # finished jobs are kept this long for their session to pick up
+
+class QueueFull(RuntimeError):
+    """JobRunner.submit: max_queued jobs are already waiting."""
+
+class JobCancelled(Exception):
+    """Raised from a cancelled job's next progress update."""
+
+class Job:
+    """
+    One upload job. progress(fraction)/text(message) match the progress bar / status
+    text objects hrpt reports to, so the job itself is passed as both.
+    status: queued -> running -> done | failed | cancelled.
+    """
+
+    def __init__(self, owner, fn, args, size=0):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.size = size
+        self.status = "queued"
+        self.fraction = 0.0
+        self.message = "Waiting for a free worker..."
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._fn = fn
+        self._args = args
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def progress(self, fraction):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.fraction = min(max(float(fraction), 0.0), 1.0)
+
+    def text(self, message):
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.message = message
+
+class JobRunner:
+    """Server-wide job queue with admission control; see the section comment above."""
+
+    def __init__(self, max_jobs=MAX_JOBS, max_queued=MAX_QUEUED_JOBS, max_bytes=MAX_JOB_UPLOAD_MB * 1024 * 1024):
+        self.max_jobs = max_jobs
+        self.max_queued = max_queued
+        self.max_bytes = max_bytes
+        self._jobs = OrderedDict()  # id -> Job, in submission order
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="hyundai-job")
+        self._lock = threading.Lock()
+
+    def submit(self, owner, fn, *args, size=0):
+        """
+        Queue fn(job, *args) for owner (e.g. a session id), cancelling owner's earlier
+        job; size: upload bytes, for admission. Returns the Job; raises QueueFull.
+        """
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if job.owner == owner and job.active:
+                    self._cancel(job)
+            if sum(job.status == "queued" for job in self._jobs.values()) >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} jobs are already waiting")
+            job = Job(owner, fn, args, size)
+            self._jobs[job.id] = job
+            self._dispatch()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a job: a queued one never starts, a running one stops at its next progress update."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.active:
+                self._cancel(job)
+
+    def position(self, job):
+        """1-based place of a queued job in the queue; 0 once it left the queue."""
+        with self._lock:
+            queued = [j for j in self._jobs.values() if j.status == "queued"]
+        return queued.index(job) + 1 if job in queued else 0
+
+    def counts(self):
+        """{"queued", "running"} job counts."""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {"queued": statuses.count("queued"), "running": statuses.count("running")}
+
+    def worker_share(self, requested):
+        """Worker processes one job may use: requested, capped at an even share of the CPUs."""
+        return max(1, min(int(requested), (os.cpu_count() or 1) // self.max_jobs))
+
+    # lock held by the callers below
+    def _cancel(self, job):
+        job._cancel.set()
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.finished = time.time()
+            job._fn = job._args = None
+
+    def _dispatch(self):
+        # strictly in order: a large upload at the head is not overtaken by smaller ones
+        running = [job for job in self._jobs.values() if job.status == "running"]
+        for job in [j for j in self._jobs.values() if j.status == "queued"]:
+            if len(running) >= self.max_jobs:
+                break
+            if running and sum(j.size for j in running) + job.size > self.max_bytes:
+                break
+            job.status = "running"
+            job.started = time.time()
+            job.message = "Starting..."
+            running.append(job)
+            self._pool.submit(self._run, job)
+
+    def _prune(self):
+        cutoff = time.time() - KEEP_SECONDS
+        for job_id in [i for i, job in self._jobs.items() if not job.active and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        result, error, status = None, None, "done"
+        try:
+            result = job._fn(job, *job._args)
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            log.exception("job %s failed", job.id)
+            status, error = "failed", str(e)
+        with self._lock:
+            if job._cancel.is_set() and status == "done":
+                status = "cancelled"  # cancelled after its last progress update: result dropped
+            job.result = result if status == "done" else None
+            job.error = error
+            job.status = status
+            job.finished = time.time()
+            job._fn = job._args = None
+            self._dispatch()
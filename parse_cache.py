@@ -0,0 +1,162 @@
+import io
+import os
+import hashlib
+import pickle
+import tempfile
+import threading
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (parquet engine)
+except ImportError:  # optional: without it every entry is pickled
+    pyarrow = None
+
+# ---------------- Parse Cache ---------------- #
+# Bump when read_file, the schemas (schemas.py) or date parsing (dates.py) change what a
+# file parses to, so old entries stop matching.
+CACHE_VERSION = 7
+DEFAULT_CACHE_DIR = os.environ.get("HYUNDAI_PARSE_CACHE_DIR",
+                                   os.path.join(tempfile.gettempdir(), "hyundai_parse_cache"))
+DEFAULT_CACHE_MB = int(os.environ.get("HYUNDAI_PARSE_CACHE_MB", "1024"))
+
+def content_key(data, header, kind, date_hints=()):
+    """
+    Cache key of a DMS export: hash of its bytes + the header row and report kind it is
+    parsed as. Entries hold the kind's schema applied (projection, dtypes), so identical
+    bytes read as another kind (a Detail copied as a Today Detail, a misnamed file) miss.
+    date_hints: the upload's date formats the parse starts from, one per date column
+    (None if not detected yet); an ambiguous date column parses by its hint, so the same
+    bytes parsed after different hints are separate entries.
+    """
+    h = hashlib.blake2b(data, digest_size=16)
+    for hint in date_hints:
+        h.update(b"\0" + str(hint).encode())
+    return f"v{CACHE_VERSION}-{kind.replace(' ', '-')}-h{header}-{h.hexdigest()}"
+
+class ParseCache:
+    """
+    On-disk cache of parsed DMS exports shared across uploads, sessions and processes.
+    Entries are keyed by file content (content_key) and stored as Parquet, or pickle
+    for frames Parquet cannot hold (mixed-type object columns, non-string headers).
+    File names carry the sniffed format: <key>.<fmt>.parquet / <key>.<fmt>.pkl.
+    Least-recently-used entries (by mtime, touched on every hit) are evicted once the
+    directory exceeds max_bytes. Size accounting is per process, so concurrent
+    writers can overshoot the limit until their next eviction pass.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = None  # key -> [file_name, size, mtime]; scanned lazily
+        self._lock = threading.Lock()
+
+    # worker processes get a fresh index and counters (see merge_counts)
+    def __getstate__(self):
+        return {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["cache_dir"], state["max_bytes"])
+
+    def _scan(self):
+        if self._entries is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = {}
+            with os.scandir(self.cache_dir) as it:
+                for e in it:
+                    if e.is_file() and e.name.endswith((".parquet", ".pkl")):
+                        st = e.stat()
+                        entries[e.name.split(".", 1)[0]] = [e.name, st.st_size, st.st_mtime]
+            self._entries = entries
+        return self._entries
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(size for _, size, _ in self._scan().values())
+
+    def get(self, key):
+        """(df, fmt) for a cached file, or None."""
+        with self._lock:
+            entry = self._scan().get(key)
+        if entry is not None:
+            path = os.path.join(self.cache_dir, entry[0])
+            try:
+                if entry[0].endswith(".parquet"):
+                    df = pd.read_parquet(path)
+                else:
+                    with open(path, "rb") as fh:
+                        df = pickle.load(fh)
+                os.utime(path)
+                with self._lock:
+                    entry[2] = os.path.getmtime(path)
+                    self.hits += 1
+                return df, entry[0].split(".")[1]
+            except Exception:
+                # evicted by another process or a partial file: treat as a miss
+                with self._lock:
+                    self._entries.pop(key, None)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, df, fmt):
+        """Store a parsed frame; failures only cost the cache entry."""
+        payload, ext = None, "pkl"
+        if pyarrow is not None and all(isinstance(c, str) for c in df.columns) and df.columns.is_unique:
+            try:
+                buf = io.BytesIO()
+                df.to_parquet(buf)
+                payload, ext = buf.getvalue(), "parquet"
+            except Exception:
+                payload = None
+        if payload is None:
+            payload = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+        name = f"{key}.{fmt}.{ext}"
+        try:
+            with self._lock:
+                self._scan()
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(payload)
+            os.replace(tmp, os.path.join(self.cache_dir, name))  # atomic for concurrent readers
+        except OSError:
+            return
+        with self._lock:
+            self._entries[key] = [name, len(payload), os.path.getmtime(os.path.join(self.cache_dir, name))]
+            self._evict()
+
+    def _evict(self):
+        total = sum(size for _, size, _ in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, (name, size, _) in sorted(self._entries.items(), key=lambda kv: kv[1][2]):
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+            del self._entries[key]
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def counts(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def merge_counts(self, counts):
+        """Add the counters of a worker process's copy of this cache."""
+        with self._lock:
+            self.hits += counts["hits"]
+            self.misses += counts["misses"]
+            self.evictions += counts["evictions"]
+
+    def stats(self):
+        """Counters plus current size, for display/logging."""
+        counts = self.counts()
+        with self._lock:
+            counts["entries"] = len(self._scan())
+        counts["mb"] = round(self.total_bytes / 2**20, 1)
+        return counts
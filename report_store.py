@@ -0,0 +1,225 @@
+import io
+import os
+import pickle
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+# ---------------- Report Store ---------------- #
+# Generated outputs (OEM_/Stock_/Pending_ frames and their workbook bytes) of a run.
+# The UI only renders the first PREVIEW_ROWS of a frame; full frames and workbooks are
+# needed again only for downloads and the dealer-wise ZIP, so once a run holds more than
+# its memory budget they are spilled to files and read back when requested.
+PREVIEW_ROWS = 5
+DEFAULT_MEMORY_MB = int(os.environ.get("HYUNDAI_REPORT_MEMORY_MB", "64"))
+DEFAULT_SPILL_DIR = os.environ.get("HYUNDAI_REPORT_SPILL_DIR",
+                                   os.path.join(tempfile.gettempdir(), "hyundai_report_spill"))
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum()) if df is not None else 0
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class StoredReport:
+    """
+    One output: its preview (head, always in memory), row count, and the full frame and
+    workbook bytes, held in memory or spilled to files. Spill files are removed when the
+    report is garbage collected; reports never change, so several stores and cached
+    per-location results can share one.
+    """
+
+    def __init__(self, frame=None, blob=None, preview_rows=PREVIEW_ROWS):
+        self.preview = frame.head(preview_rows).copy() if frame is not None else None
+        self.rows = len(frame) if frame is not None else 0
+        self.frame_bytes = _frame_bytes(frame)  # the full frame's in-memory size, kept once it is spilled
+        self.has_frame = frame is not None
+        self.has_workbook = bool(blob)
+        self.spilled_bytes = 0
+        self._frame = frame
+        self._blob = blob
+        self._frame_path = None
+        self._blob_path = None
+        self._lock = threading.Lock()
+
+    # pickled (disk result cache) with the data itself, never with spill file paths
+    def __getstate__(self):
+        return {"preview": self.preview, "rows": self.rows, "frame": self.frame(), "blob": self.blob()}
+
+    def __setstate__(self, state):
+        self.__init__(state["frame"], state["blob"])
+        self.preview, self.rows = state["preview"], state["rows"]
+
+    @property
+    def spilled(self):
+        return self._frame_path is not None or self._blob_path is not None
+
+    @property
+    def nbytes(self):
+        """Bytes held in memory, preview included."""
+        with self._lock:
+            return _frame_bytes(self.preview) + _frame_bytes(self._frame) + len(self._blob or b"")
+
+    def spill(self, spill_dir):
+        """Move the frame and workbook bytes to files under spill_dir; False if that failed (kept in memory)."""
+        with self._lock:
+            if self._frame is None and self._blob is None:
+                return True
+            paths = []
+            try:
+                os.makedirs(spill_dir, exist_ok=True)
+                frame_path = blob_path = None
+                if self._frame is not None:
+                    fd, frame_path = tempfile.mkstemp(dir=spill_dir, suffix=".pkl")
+                    paths.append(frame_path)
+                    with os.fdopen(fd, "wb") as fh:
+                        pickle.dump(self._frame, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                if self._blob is not None:
+                    fd, blob_path = tempfile.mkstemp(dir=spill_dir, suffix=".xlsx")
+                    paths.append(blob_path)
+                    with os.fdopen(fd, "wb") as fh:
+                        fh.write(self._blob)
+            except OSError:
+                _remove(paths)
+                return False
+            self.spilled_bytes = sum(os.path.getsize(p) for p in paths)
+            weakref.finalize(self, _remove, paths)
+            self._frame_path, self._blob_path = frame_path, blob_path
+            self._frame = self._blob = None
+            return True
+
+    def frame(self):
+        """The full frame, read back from disk if spilled; None if the output has none."""
+        with self._lock:
+            frame, path = self._frame, self._frame_path
+        if path is None:
+            return frame
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+    def open(self):
+        """Binary file object over the workbook bytes (the spill file itself if spilled); None if none."""
+        with self._lock:
+            blob, path = self._blob, self._blob_path
+        if path is not None:
+            return open(path, "rb")
+        return io.BytesIO(blob) if blob is not None else None
+
+    def blob(self):
+        """The workbook bytes; None if the output has none."""
+        fh = self.open()
+        if fh is None:
+            return None
+        with fh:
+            return fh.read()
+
+class ReportStore:
+    """
+    Outputs of one run by file name, listed in the order they were added. At most
+    max_bytes of full frames and workbooks stay in memory; past that the earliest
+    reports are spilled to spill_dir (previews always stay).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_MB * 1024 * 1024, spill_dir=DEFAULT_SPILL_DIR,
+                 preview_rows=PREVIEW_ROWS):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.preview_rows = preview_rows
+        self.memory_bytes = 0
+        self._reports = {}               # name -> StoredReport
+        self._resident = OrderedDict()   # id(report) -> (report, bytes) held in memory, oldest first
+        self._lock = threading.Lock()
+
+    def wrap(self, previews, files):
+        """
+        {name: StoredReport} for one location's previews/files dicts, counted against the
+        memory budget right away (so a location's frames can be spilled while later
+        locations are built) but only listed once passed to add().
+        """
+        reports = {}
+        for name in list(dict.fromkeys(list(previews) + list(files))):
+            reports[name] = StoredReport(previews.get(name), files.get(name), self.preview_rows)
+        with self._lock:
+            for report in reports.values():
+                self._track(report)
+            self._enforce()
+        return reports
+
+    def add(self, name, report):
+        """List a StoredReport (e.g. one reused from an earlier run) under name."""
+        with self._lock:
+            self._reports[name] = report
+            self._track(report)
+            self._enforce()
+
+    def _track(self, report):
+        if not report.spilled and id(report) not in self._resident:
+            size = report.nbytes - _frame_bytes(report.preview)
+            self._resident[id(report)] = (report, size)
+            self.memory_bytes += size
+
+    def _enforce(self):
+        # spill oldest first; if the spill directory is not writable (disk full) everything stays in memory
+        while self.memory_bytes > self.max_bytes and self._resident:
+            key, (report, size) = next(iter(self._resident.items()))
+            if not report.spill(self.spill_dir):
+                break
+            del self._resident[key]
+            self.memory_bytes -= size
+
+    @property
+    def nbytes(self):
+        """In-memory size, previews included (for the result cache's accounting)."""
+        with self._lock:
+            reports = list(self._reports.values())
+        return self.memory_bytes + sum(_frame_bytes(r.preview) for r in reports)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._reports))
+
+    def __len__(self):
+        return len(self._reports)
+
+    def __contains__(self, name):
+        return name in self._reports
+
+    def report(self, name):
+        return self._reports.get(name)
+
+    def preview(self, name):
+        report = self._reports.get(name)
+        return report.preview if report is not None else None
+
+    def frame(self, name):
+        report = self._reports.get(name)
+        return report.frame() if report is not None else None
+
+    def blob(self, name):
+        report = self._reports.get(name)
+        return report.blob() if report is not None else None
+
+    def open(self, name):
+        report = self._reports.get(name)
+        return report.open() if report is not None else None
+
+    def memory(self):
+        """
+        {"reports", "rows", "frame_mb", "bytes_per_row", "mb", "spilled", "spilled_mb"} over the
+        listed reports. frame_mb/bytes_per_row: size of the full frames in memory (spilled ones
+        as they were before spilling); mb: what is held in memory now.
+        """
+        with self._lock:
+            reports = list(self._reports.values())
+        spilled = [r for r in reports if r.spilled]
+        rows = sum(r.rows for r in reports)
+        frame_bytes = sum(r.frame_bytes for r in reports)
+        return {"reports": len(reports), "rows": rows, "frame_mb": round(frame_bytes / 2**20, 1),
+                "bytes_per_row": round(frame_bytes / rows, 1) if rows else 0,
+                "mb": round(self.nbytes / 2**20, 1), "spilled": len(spilled),
+                "spilled_mb": round(sum(r.spilled_bytes for r in spilled) / 2**20, 1)}
@@ -0,0 +1,163 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import pandas as pd
+from report_store import ReportStore, StoredReport
+
+# Spill files of generated reports the in-memory result cache keeps alive; they are removed
+# when the cache drops the last entry holding a report.
+DEFAULT_SPILL_MB = int(os.environ.get("HYUNDAI_RESULT_SPILL_MB", "4096"))
+
+# ---------------- Upload Hashing ---------------- #
+def upload_digest(uploaded_file, chunk_size=1024 * 1024):
+    """sha256 of an uploaded file's content (Streamlit UploadedFile or any binary file object)."""
+    h = hashlib.sha256()
+    uploaded_file.seek(0)
+    for chunk in iter(lambda: uploaded_file.read(chunk_size), b""):
+        h.update(chunk)
+    uploaded_file.seek(0)
+    return h.hexdigest()
+
+def estimate_size(obj):
+    """Approximate in-memory size in bytes of cached results (frames, bytes, containers)."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (ReportStore, StoredReport)):
+        return obj.nbytes  # only what is held in memory, not the spilled files
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(estimate_size(v) for v in obj)
+    return 64
+
+def stored_reports(obj):
+    """{id: StoredReport} of every report inside cached results (ReportStores, containers)."""
+    found = {}
+    def walk(o):
+        if isinstance(o, StoredReport):
+            found[id(o)] = o
+        elif isinstance(o, ReportStore):
+            for name in o:
+                walk(o.report(name))
+        elif isinstance(o, dict):
+            for v in o.values():
+                walk(v)
+        elif isinstance(o, (list, tuple, set)):
+            for v in o:
+                walk(v)
+    walk(obj)
+    return found
+
+# ---------------- Result Cache ---------------- #
+class ResultCache:
+    """
+    Server-wide LRU cache of pipeline results (validation outcome, generated
+    reports) keyed by upload digest + run parameters. Entries are evicted
+    least-recently-used first once their in-memory size exceeds max_bytes or the
+    spill files of the reports they hold exceed max_spill_bytes. A report shared by
+    several entries (a run and its per-location results) is charged once; its spill
+    size is re-read whenever an entry holding it is put.
+    """
+
+    def __init__(self, max_bytes, max_spill_bytes=DEFAULT_SPILL_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size, {id: StoredReport})
+        self._reports = {}             # id -> [StoredReport, entries holding it, spilled bytes charged]
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        reports = stored_reports(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes or sum(r.spilled_bytes for r in reports.values()) > self.max_spill_bytes:
+                return  # larger than the whole budget: don't cache
+            self._entries[key] = (value, size, reports)
+            self.total_bytes += size
+            for rid, report in reports.items():
+                ref = self._reports.setdefault(rid, [report, 0, 0])
+                ref[1] += 1
+                self.spilled_bytes += report.spilled_bytes - ref[2]
+                ref[2] = report.spilled_bytes
+            while self.total_bytes > self.max_bytes or self.spilled_bytes > self.max_spill_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, size, reports = self._entries.pop(key)
+        self.total_bytes -= size
+        for rid in reports:
+            ref = self._reports[rid]
+            ref[1] -= 1
+            if not ref[1]:
+                self.spilled_bytes -= ref[2]
+                del self._reports[rid]
+
+class DiskResultCache:
+    """
+    ResultCache with the same get/put interface, pickled to files under cache_dir so
+    results outlive the process (e.g. per-location results between CLI runs).
+    Least-recently-used files (by mtime, touched on get) are evicted over max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                stored_key, value = pickle.load(fh)
+            os.utime(path)
+        except Exception:
+            return None
+        return value if stored_key == key else None
+
+    def put(self, key, value):
+        payload = pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(payload)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        with os.scandir(self.cache_dir) as it:
+            entries = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in it if e.name.endswith(".pkl")]
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
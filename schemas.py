@@ -0,0 +1,182 @@
+from typing import NamedTuple
+import pandas as pd
+from dates import parse_dates
+
+# ---------------- Report Schemas ---------------- #
+class ReportSchema(NamedTuple):
+    """
+    How one Hyundai report kind is read.
+    columns: positional names given to the parsed columns, or None when the file's
+             own header row is used (Transfer Detail, Stock).
+    dtypes:  column -> "qty" (numeric, missing = 0), "number" (numeric, missing kept),
+             "date" (datetime64 via dates.parse_dates, unparseable = NaT) or "text" (parsed
+             as strings by the readers, see text_columns; missing kept); others keep the
+             values they were read with.
+    uses:    stage -> columns that stage needs ("periods", "cross_sums", "reports").
+             Only their union is kept in memory; a stage missing here never reads the kind.
+    """
+    prefixes: tuple
+    header: int
+    columns: tuple
+    dtypes: dict
+    uses: dict
+
+BO_COLS = ('ORDER NO', 'LINE', 'PART NO_ORDER', 'PART NO_CURRENT', 'PART NAME',
+           'PARTSOURCE', 'QUANTITY_ORDER', 'QUANTITY_CURRENT', 'B/O', 'PO DATE',
+           'PDC', 'ETA', 'MSG', 'PROCESSING_ALLOCATION', 'PROCESSING_ON-PICK',
+           'PROCESSING_ON-PACK', 'PROCESSING_PACKED', 'PROCESSING_INVOICE',
+           'PROCESSING_SHIPPEO', 'LOST QTY', 'ELAP')
+
+# Receiving Pending / Today Detail
+RPD_COLS = ('SEQ','CASE NO ','ORDER NO ','LINE NO','PART NO _SUPPLY','PART NO _ORDER','H/K','PART NAME',
+            'SUPPLY QTY','ORDER QTY','ACCEPT QTY','CLAIM QTY','CLAIM TYPE','CLAIM CODE','LOC','LIST PRICE',
+            'NDP (UNIT)','ED (UNIT)','MAT VALUE','DEPOT S/C','VOR S/C','OTHER CHARGES','STAX(%)','CTAX(%)',
+            'ITAX(%)','TAX(%)','HSN CODE','TAX AMT','FRT/INS','SGST AMT','CGST AMT','IGST AMT','COMP CESS AMT',
+            'LANDED COST','ORDER DATE','RECEIVING DATE','STATUS')
+
+# Receiving Pending / Today List
+RPL_COLS = ('SEQ','H/K','GR_NO','GR_TYPE','GR_STATUS','INVOICE_NO','INVOICE_DATE',
+            'SHIPPED INFORMATION_SUPPLIER','SHIPPED INFORMATION_TRUCK NO','SHIPPED INFORMATION_CARRIER NAME',
+            'SHIPPED INFORMATION_FINISH DATE','SHIPPED INFORMATION_ACCEPT QTY','SHIPPED INFORMATION_CLAIM QTY',
+            'SHIPPED INFORMATION_MAT VALUE','SHIPPED INFORMATION_FREIGHT AMT','SHIPPED INFORMATION_SGST AMT',
+            'SHIPPED INFORMATION_IGST AMT','SHIPPED INFORMATION_TCS AMT','SHIPPED INFORMATION_TAX AMOUNT')
+
+TL_COLS = ('TRANSFER NO','REQ.DATE','REQ.TIME','SEND DATE','SEND.TIME','RECE.DATE','RECE.TIME','REQU.DEALER',
+           'SEND DEALER','ITEM_REQ','ITEM_SEND','QUANTITY_REQ','QUANTITY_SEND','AMOUNT','AMOUNT2','TAXABLE AMT',
+           'SGST AMT','CGST AMT','IGST AMT','COMP CESS AMT','STATUS')
+
+# Transfer Detail is less standardized: the summed quantity is the first of these present
+TD_QTY_CANDIDATES = ("QUANTITY", "QTY", "QUANTITY_SEND", "QUANTITY_REQ", "ITEM_SEND")
+
+BO_QTY_COLS = ('B/O', 'PROCESSING_ALLOCATION', 'PROCESSING_ON-PICK', 'PROCESSING_ON-PACK',
+               'PROCESSING_PACKED', 'PROCESSING_INVOICE', 'PROCESSING_SHIPPEO', 'QUANTITY_CURRENT')
+
+_DETAIL = dict(
+    columns=RPD_COLS,
+    dtypes={'ORDER DATE': 'date', 'ACCEPT QTY': 'number'},
+    uses={'periods': ('ORDER DATE',),
+          'cross_sums': ('ACCEPT QTY',),
+          'reports': ('ORDER NO ', 'PART NO _SUPPLY', 'ORDER DATE', 'ACCEPT QTY')},
+)
+_LIST = dict(
+    columns=RPL_COLS,
+    dtypes={'SHIPPED INFORMATION_ACCEPT QTY': 'number'},
+    uses={'cross_sums': ('SHIPPED INFORMATION_ACCEPT QTY',)},
+)
+
+# Both "receiving" and the common DMS typo "receving" are accepted for the Receiving reports.
+SCHEMAS = {
+    "bo list": ReportSchema(
+        prefixes=("bo list",), header=1, columns=BO_COLS,
+        dtypes={'PO DATE': 'date', **dict.fromkeys(BO_QTY_COLS, 'qty')},
+        uses={'periods': ('PO DATE',),
+              'reports': ('ORDER NO', 'PART NO_CURRENT', 'PO DATE') + BO_QTY_COLS}),
+    "receiving pending list": ReportSchema(
+        prefixes=("receiving pending list", "receving pending list"), header=2, **_LIST),
+    "receiving pending detail": ReportSchema(
+        prefixes=("receiving pending detail", "receving pending detail"), header=1, **_DETAIL),
+    "receiving today list": ReportSchema(
+        prefixes=("receiving today list", "receving today list"), header=2, **_LIST),
+    "receiving today detail": ReportSchema(
+        prefixes=("receiving today detail", "receving today detail"), header=1, **_DETAIL),
+    "transfer list": ReportSchema(
+        prefixes=("transfer list",), header=1, columns=TL_COLS,
+        dtypes={'REQ.DATE': 'date', 'QUANTITY_SEND': 'number'},
+        uses={'periods': ('REQ.DATE',), 'cross_sums': ('QUANTITY_SEND',)}),
+    "transfer detail": ReportSchema(
+        prefixes=("transfer detail",), header=0, columns=None,
+        dtypes=dict.fromkeys(TD_QTY_CANDIDATES, 'number'),
+        uses={'cross_sums': TD_QTY_CANDIDATES, 'reports': ('PART NO ?', 'QUANTITY')}),
+    "stock": ReportSchema(
+        prefixes=("stock",), header=0, columns=None,
+        dtypes={'PART NO ?': 'text', 'PART TYPE': 'text', 'ON-HAND': 'number'},
+        uses={'reports': ('PART NO ?', 'PART TYPE', 'ON-HAND')}),
+}
+
+def used_columns(kind):
+    """Union of the columns any stage reads from `kind`, in first-use order."""
+    return tuple(dict.fromkeys(c for cols in SCHEMAS[kind].uses.values() for c in cols))
+
+def read_columns(kind):
+    """
+    Header names the readers keep for `kind` (see frame_store.read_file): used_columns for
+    kinds read by header name; () for positional kinds, whose columns are only known by place
+    once parsed (a short export would make positional usecols fail) and are projected here.
+    """
+    return used_columns(kind) if SCHEMAS[kind].columns is None else ()
+
+def stage_kinds(stage):
+    """Report kinds a stage reads."""
+    return [kind for kind, schema in SCHEMAS.items() if stage in schema.uses]
+
+def date_columns(kind):
+    """The kind's "date" columns."""
+    return tuple(col for col, dtype in SCHEMAS[kind].dtypes.items() if dtype == "date")
+
+def text_columns(kind):
+    """
+    Header names of the kind's "text" columns. The readers parse them as strings, so a code
+    column keeps its digits whatever the other values in the file (or in one chunk of it) are.
+    """
+    return tuple(col for col, dtype in SCHEMAS[kind].dtypes.items() if dtype == "text")
+
+def convert(values, dtype, source=None, formats=None):
+    """
+    Coerce one column to a schema dtype. Dates: source is (kind, column), the key of the
+    column's format in `formats`, the upload's detected date formats (see dates.parse_dates).
+    """
+    if dtype == "qty":
+        return pd.to_numeric(values, errors="coerce").fillna(0)
+    if dtype == "number":
+        return pd.to_numeric(values, errors="coerce")
+    if dtype == "date":
+        return parse_dates(values, source, formats)
+    return values
+
+def apply_schema(df, kind, date_formats=None):
+    """
+    Named, projected and typed frame from a raw parse: positional names applied,
+    only used_columns(kind) kept (those the file actually has; the Excel readers already
+    skip the others of a header-named kind, see read_columns), dtypes converted.
+    date_formats: the upload's detected date formats (FrameStore.date_formats), or None.
+    """
+    if df is None:
+        return None
+    schema = SCHEMAS[kind]
+    wanted = used_columns(kind)
+    if schema.columns is not None:
+        names = schema.columns[:df.shape[1]]
+        keep = [i for i, name in enumerate(names) if name in wanted]
+        out = df.iloc[:, keep].set_axis([names[i] for i in keep], axis=1)
+    else:
+        out = df[[c for c in wanted if c in df.columns]]
+    for col, dtype in schema.dtypes.items():
+        if col in out.columns:
+            out[col] = convert(out[col], dtype, (kind, col), date_formats)
+    return out
+
+# ---------------- Output Schemas ---------------- #
+# Column types of the generated outputs, per report (file name prefix): "text" (strings,
+# missing kept) or "number" (float64). Applied to Parquet outputs (output_frame) so every
+# file of a report has one Arrow schema, whichever values its locations happened to hold.
+_LABELS = dict.fromkeys(('Brand', 'Dealer', 'Location'), 'text')
+OUTPUT_DTYPES = {
+    "OEM": {**_LABELS, 'OrderNumber': 'text', 'PartNumber': 'text', 'OrderDate': 'text', 'POQty': 'number',
+            'Remark': 'text', 'OEMInvoiceNo': 'text', 'OEMInvoiceDate': 'text', 'OEMInvoiceQty': 'text'},
+    "OEMStatus": {'Location': 'text', 'OrderNumber': 'text'},
+    "Stock": {**_LABELS, 'Partnumber': 'text', 'Qty': 'number'},
+    "Pending": {**_LABELS, 'PartNumber': 'text', 'Qty': 'number'},
+}
+
+def output_frame(report, df):
+    """`df` with the OUTPUT_DTYPES of `report` ("OEM", "Stock", ...); other columns as they are."""
+    dtypes = {col: dtype for col, dtype in OUTPUT_DTYPES.get(report, {}).items() if col in df.columns}
+    if not dtypes:
+        return df
+    df = df.copy(deep=False)
+    for col, dtype in dtypes.items():
+        if dtype == "number":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        else:
+            df[col] = df[col].astype("str")
+    return df
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dates import SAMPLE_SIZE, detect_format, parse_dates
+
+SOURCE = ("bo list", "PO DATE")
+
+def iso(parsed):
+    return [None if pd.isna(v) else v.strftime("%Y-%m-%d") for v in parsed]
+
+@pytest.mark.parametrize("values, fmt", [
+    (["25-10-2026", "03-11-2026"], "%d-%m-%Y"),
+    (["25/10/26", "03/11/26"], "%d/%m/%y"),
+    (["10-25-2026", "11-03-2026"], "%m-%d-%Y"),
+    (["10/25/2026", "11/03/2026"], "%m/%d/%Y"),
+    (["2026-10-25", "2026-11-03"], "%Y-%m-%d"),
+    (["25-Oct-2026", "03-Nov-2026"], "%d-%b-%Y"),
+])
+def test_detects_day_first_and_month_first(values, fmt):
+    assert detect_format(pd.Series(values)) == fmt
+    assert iso(parse_dates(pd.Series(values))) == ["2026-10-25", "2026-11-03"]
+
+def test_ambiguous_sample_is_day_first():
+    # every day <= 12: both orders parse, the DMS default (day first) wins
+    values = pd.Series(["03-04-2026", "05-06-2026", "12-11-2026"])
+    assert detect_format(values) == "%d-%m-%Y"
+    assert iso(parse_dates(values)) == ["2026-04-03", "2026-06-05", "2026-11-12"]
+
+def test_a_late_day_over_12_rules_out_the_other_order():
+    # ambiguous at the top, month-first only decided far down the column
+    values = ["01-02-2026"] * (SAMPLE_SIZE * 4) + ["01-31-2026"]
+    parsed = parse_dates(pd.Series(values))
+    assert parsed.notna().all()
+    assert iso(parsed[:1]) == ["2026-01-02"] and iso(parsed[-1:]) == ["2026-01-31"]
+
+def test_ambiguous_file_follows_its_own_uploads_hint():
+    month_first, day_first, ambiguous = {}, {}, pd.Series(["03-04-2026", "05-06-2026"])
+    parse_dates(pd.Series(["10-25-2026"]), SOURCE, month_first)
+    parse_dates(pd.Series(["25-10-2026"]), SOURCE, day_first)
+    assert month_first == {SOURCE: "%m-%d-%Y"} and day_first == {SOURCE: "%d-%m-%Y"}
+    assert iso(parse_dates(ambiguous, SOURCE, month_first)) == ["2026-03-04", "2026-05-06"]
+    assert iso(parse_dates(ambiguous, SOURCE, day_first)) == ["2026-04-03", "2026-06-05"]
+    # nothing is remembered between calls without the caller's dict
+    assert iso(parse_dates(ambiguous, SOURCE)) == ["2026-04-03", "2026-06-05"]
+
+def test_hint_that_does_not_fit_is_replaced():
+    formats = {SOURCE: "%m-%d-%Y"}
+    assert iso(parse_dates(pd.Series(["25-10-2026"]), SOURCE, formats)) == ["2026-10-25"]
+    assert formats == {SOURCE: "%d-%m-%Y"}
+
+def test_mixed_and_unparseable_values():
+    values = pd.Series(["25-10-2026", "2026-10-26 08:30:00", "", None, "n/a", pd.Timestamp("2026-10-27")],
+                       dtype=object)
+    assert iso(parse_dates(values)) == ["2026-10-25", "2026-10-26", None, None, None, "2026-10-27"]
+
+def test_datetime_and_numeric_columns_pass_through():
+    stamps = pd.Series(pd.to_datetime(["2026-10-25", None]))
+    pd.testing.assert_series_equal(parse_dates(stamps), stamps)
+    assert parse_dates(pd.Series([np.nan, np.nan])).isna().all()
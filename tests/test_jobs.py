@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+from jobs import JobCancelled, JobRunner, QueueFull
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def blocked(job, release, calls=None):
+    # a job that runs until the test releases it
+    if calls is not None:
+        calls.append(job.id)
+    assert release.wait(5)
+    return job.id
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()  # never leave pool threads blocked
+
+def test_queue_full_rejects_admission(release):
+    runner = JobRunner(max_jobs=1, max_queued=1)
+    running = runner.submit("a", blocked, release)
+    wait_for(lambda: running.status == "running")
+    queued = runner.submit("b", blocked, release)
+    assert queued.status == "queued" and runner.position(queued) == 1
+    with pytest.raises(QueueFull):
+        runner.submit("c", blocked, release)
+    assert runner.counts() == {"queued": 1, "running": 1}
+
+    release.set()
+    wait_for(lambda: not queued.active)
+    assert (running.status, running.result) == ("done", running.id)
+    assert (queued.status, queued.result) == ("done", queued.id)
+    # the queue has room again
+    assert runner.submit("c", blocked, release) is not None
+
+def test_cancelled_queued_job_never_starts(release):
+    runner = JobRunner(max_jobs=1)
+    calls = []
+    first = runner.submit("a", blocked, release, calls)
+    wait_for(lambda: first.status == "running")
+    second = runner.submit("b", blocked, release, calls)
+    assert runner.position(second) == 1
+
+    runner.cancel(second.id)
+    assert second.status == "cancelled" and not second.active
+    assert runner.position(second) == 0
+    release.set()
+    wait_for(lambda: first.status == "done")
+    time.sleep(0.05)
+    assert calls == [first.id]
+    assert second.status == "cancelled" and second.result is None
+
+def test_new_job_of_an_owner_cancels_its_queued_one(release):
+    runner = JobRunner(max_jobs=1)
+    runner.submit("a", blocked, release)
+    old = runner.submit("b", blocked, release)
+    new = runner.submit("b", blocked, release)
+    assert old.status == "cancelled" and new.status == "queued"
+    assert runner.position(new) == 1
+
+def test_progress_and_cancelling_a_running_job(release):
+    runner = JobRunner(max_jobs=1)
+    reported = threading.Event()
+
+    def work(job):
+        job.text("half way")
+        job.progress(0.5)
+        reported.set()
+        assert release.wait(5)
+        job.progress(1.0)  # raises once the job is cancelled
+        return "finished"
+
+    job = runner.submit("a", work)
+    assert reported.wait(5)
+    assert (job.status, job.fraction, job.message) == ("running", 0.5, "half way")
+    runner.cancel(job.id)
+    assert job.status == "running"  # stops at its next progress update
+    release.set()
+    wait_for(lambda: not job.active)
+    assert job.status == "cancelled" and job.result is None
+
+def test_progress_is_clamped_and_raises_when_cancelled():
+    runner = JobRunner(max_jobs=1)
+    job = runner.submit("a", lambda job: None)
+    wait_for(lambda: not job.active)
+    job.progress(2)
+    assert job.fraction == 1.0
+    job.progress(-1)
+    assert job.fraction == 0.0
+    job._cancel.set()
+    with pytest.raises(JobCancelled):
+        job.progress(0.5)
+    with pytest.raises(JobCancelled):
+        job.text("more")
+
+def test_large_upload_waits_for_running_ones_and_then_runs_alone(release):
+    runner = JobRunner(max_jobs=2, max_bytes=100)
+    small = runner.submit("a", blocked, release, size=60)
+    wait_for(lambda: small.status == "running")
+    large = runner.submit("b", blocked, release, size=150)
+    assert large.status == "queued"  # 60 + 150 > max_bytes, although a worker is free
+    release.set()
+    wait_for(lambda: not large.active)
+    assert small.status == large.status == "done"
+
+def test_failed_job_keeps_its_error():
+    runner = JobRunner(max_jobs=1)
+
+    def fail(job):
+        raise ValueError("bad upload")
+
+    job = runner.submit("a", fail)
+    wait_for(lambda: not job.active)
+    assert (job.status, job.error, job.result) == ("failed", "bad upload", None)
@@ -0,0 +1,113 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from hrpt import transit_remarks
+from schemas import BO_COLS, BO_QTY_COLS, apply_schema
+
+PROCESSING = ('B/O', 'PROCESSING_ALLOCATION', 'PROCESSING_ON-PICK', 'PROCESSING_ON-PACK',
+              'PROCESSING_PACKED', 'PROCESSING_INVOICE')
+
+def to_num(s):
+    return pd.to_numeric(s, errors="coerce").fillna(0)
+
+def legacy_transit_remarks(oem_work, numerics=True):
+    # the row-wise version transit_remarks replaced, as it ran in process_files
+    if numerics:
+        for c in BO_QTY_COLS:
+            if c in oem_work.columns:
+                oem_work[c] = to_num(oem_work[c])
+    oem_work['transit'] = (
+        oem_work.get('B/O', 0)
+        + oem_work.get('PROCESSING_ALLOCATION', 0)
+        + oem_work.get('PROCESSING_ON-PICK', 0)
+        + oem_work.get('PROCESSING_ON-PACK', 0)
+        + oem_work.get('PROCESSING_PACKED', 0)
+        + oem_work.get('PROCESSING_INVOICE', 0)
+    )
+    oem_work['T/F'] = oem_work.get('QUANTITY_CURRENT', 0).eq(oem_work.get('PROCESSING_SHIPPEO', 0))
+
+    def _remark(r):
+        if r['transit'] == 0.0 and bool(r['T/F']) is True:
+            return 'Ok'
+        if r['transit'] > 0.0 and bool(r['T/F']) is False:
+            return 'Ok'
+        if r['transit'] == 0.0 and bool(r['T/F']) is False:
+            return 'Pls Check'
+        return None
+
+    oem_work['Remark'] = oem_work.apply(_remark, axis=1)
+    oem_work['transit'] = oem_work.apply(lambda row: row['QUANTITY_CURRENT'] if row['Remark'] == 'Pls Check'
+                                         else row['transit'], axis=1)
+    return oem_work
+
+def bo_list(qty_rows):
+    """Raw BO LIST rows (as parsed, before the schema) with the given {column: value} quantities."""
+    rows = []
+    for i, qtys in enumerate(qty_rows):
+        row = dict.fromkeys(BO_COLS, "")
+        row.update({'ORDER NO': f"PO{i:04d}", 'PART NO_CURRENT': f"P{i}", 'PO DATE': "15/09/2026"})
+        row.update({c: 0 for c in BO_QTY_COLS})
+        row.update(qtys)
+        rows.append([row[c] for c in BO_COLS])
+    return pd.DataFrame(rows, columns=range(len(BO_COLS)), dtype=object)
+
+EDGE_ROWS = [
+    {},                                                                  # every quantity 0
+    {'QUANTITY_CURRENT': 5},                                             # nothing shipped, nothing in transit
+    {'QUANTITY_CURRENT': 5, 'PROCESSING_SHIPPEO': 5},                    # all shipped
+    {'QUANTITY_CURRENT': 5, 'B/O': 5},                                   # back-ordered
+    {'QUANTITY_CURRENT': 5, 'PROCESSING_SHIPPEO': 5, 'B/O': 2},          # in transit and all shipped
+    {'QUANTITY_CURRENT': 5, 'B/O': -5},                                  # negative transit
+    {'QUANTITY_CURRENT': 3, 'B/O': 2, 'PROCESSING_PACKED': -2},          # transit cancels out to 0
+    {'QUANTITY_CURRENT': -1},                                            # negative current quantity
+    {'QUANTITY_CURRENT': np.nan, 'PROCESSING_SHIPPEO': np.nan},          # missing quantities
+    {'QUANTITY_CURRENT': 4, 'B/O': np.nan, 'PROCESSING_ALLOCATION': 1},  # missing B/O
+    {'QUANTITY_CURRENT': "abc", 'B/O': "x"},                             # non-numeric
+    {'QUANTITY_CURRENT': "", 'PROCESSING_INVOICE': "n/a"},               # blank / text
+    {'QUANTITY_CURRENT': "7", 'PROCESSING_ON-PICK': "0.5"},              # numbers as text, fractional
+    {'QUANTITY_CURRENT': 2.5, 'PROCESSING_SHIPPEO': 2.5},
+]
+
+def random_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    pool = [0, 0, 0, 1, 2, 5, -1, -3, 0.5, np.nan, None, "abc", "", "3"]
+    return [{c: pool[rng.integers(len(pool))] for c in BO_QTY_COLS} for _ in range(n)]
+
+def assert_same(raw):
+    expected = legacy_transit_remarks(raw.set_axis(BO_COLS, axis=1).copy())
+    out = transit_remarks(apply_schema(raw, "bo list").copy())
+    assert out['Remark'].tolist() == expected['Remark'].tolist()
+    np.testing.assert_array_equal(out['transit'].to_numpy(dtype=float), expected['transit'].to_numpy(dtype=float))
+    assert out['T/F'].tolist() == expected['T/F'].tolist()
+
+def test_edge_rows():
+    assert_same(bo_list(EDGE_ROWS))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_rows(seed):
+    assert_same(bo_list(random_rows(300, seed)))
+
+def test_all_processing_zero():
+    raw = bo_list([{'QUANTITY_CURRENT': q, 'PROCESSING_SHIPPEO': s} for q, s in itertools.product((0, 3), (0, 3))])
+    assert_same(raw)
+    out = transit_remarks(apply_schema(raw, "bo list").copy())
+    assert out['Remark'].tolist() == ['Ok', 'Pls Check', 'Pls Check', 'Ok']
+    assert out['transit'].tolist() == [0, 0, 3, 0]
+
+def test_missing_values_reach_the_rules():
+    # without the schema's numeric conversion NaN quantities fall through every rule (no Remark)
+    values = [0.0, 2.0, -2.0, np.nan]
+    rows = [dict(zip(('QUANTITY_CURRENT', 'PROCESSING_SHIPPEO', 'B/O'), combo))
+            for combo in itertools.product(values, repeat=3)]
+    frame = bo_list(rows).set_axis(BO_COLS, axis=1)
+    frame[list(BO_QTY_COLS)] = frame[list(BO_QTY_COLS)].astype(float)
+    expected = legacy_transit_remarks(frame.copy(), numerics=False)
+    out = transit_remarks(frame.copy())
+    assert out['Remark'].tolist() == expected['Remark'].tolist()
+    np.testing.assert_array_equal(out['transit'].to_numpy(dtype=float), expected['transit'].to_numpy(dtype=float))
+    assert out['Remark'].isna().any()
+
+def test_empty_frame():
+    out = transit_remarks(apply_schema(bo_list([]), "bo list").copy())
+    assert out.empty and {'transit', 'T/F', 'Remark'} <= set(out.columns)
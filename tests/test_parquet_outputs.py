@@ -0,0 +1,54 @@
+import io
+import zipfile
+from datetime import datetime
+import pandas as pd
+import pytest
+from frame_store import FrameStore
+from hrpt import build_dealer_zip, generate_reports
+from schemas import BO_COLS
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+TODAY = datetime.today().strftime("%d-%m-%Y")
+
+def bo_list(path, orders, qty):
+    # BO LIST export: a title row, then the header row (header=1)
+    rows = [["BO LIST"] + [None] * (len(BO_COLS) - 1), list(BO_COLS)]
+    for order, q in zip(orders, qty):
+        row = dict.fromkeys(BO_COLS, 0)
+        row.update({"ORDER NO": order, "PART NO_CURRENT": f"P-{order}", "PO DATE": TODAY,
+                    "B/O": q, "QUANTITY_CURRENT": q})
+        rows.append([row[c] for c in BO_COLS])
+    pd.DataFrame(rows).to_csv(path, index=False, header=False)
+
+def write_location(path, orders, qty, on_hand, transfer_qty):
+    path.mkdir(parents=True)
+    bo_list(path / "BO LIST 1.csv", orders, qty)
+    pd.DataFrame({"PART NO ?": [f"S{i}" for i in range(len(on_hand))], "PART TYPE": "X",
+                  "ON-HAND": on_hand}).to_csv(path / "Stock 1.csv", index=False)
+    pd.DataFrame({"PART NO ?": [f"T{i}" for i in range(len(transfer_qty))],
+                  "QUANTITY": transfer_qty}).to_csv(path / "Transfer Detail 1.csv", index=False)
+
+def test_location_and_dealer_files_share_one_parquet_schema(tmp_path):
+    # the two locations differ in everything that used to leak into the Arrow types: small vs
+    # large and fractional quantities, blanks, numeric vs alphanumeric order numbers
+    dealer = tmp_path / "HYUNDAI" / "DLR"
+    write_location(dealer / "LOC1", [1001, 1002], [1, 2], [3, 4], [1, 2])
+    write_location(dealer / "LOC2", ["PO-2001", "PO-2002"], [40000, None], [1.5, 70000], [2.5, None])
+    all_locations = [("HYUNDAI", "DLR", loc, str(dealer / loc)) for loc in ("LOC1", "LOC2")]
+
+    reports, errors = generate_reports(all_locations, len(all_locations), None, None, ["Spares"], FrameStore(),
+                                       output_format="parquet")
+    assert not errors
+    combined = zipfile.ZipFile(io.BytesIO(build_dealer_zip(reports)))
+    checked = 0
+    for name in combined.namelist():
+        dealer_schema = pq.read_schema(io.BytesIO(combined.read(name)))
+        report = name.split("_")[0]
+        for loc in ("LOC1", "LOC2"):
+            with reports.open(f"{report}_HYUNDAI_DLR_{loc}.parquet") as fh:
+                location_schema = pq.read_schema(io.BytesIO(fh.read()))
+            assert location_schema.equals(dealer_schema), f"{report} {loc}: {location_schema} != {dealer_schema}"
+            checked += 1
+    assert {name.split("_")[0] for name in combined.namelist()} >= {"OEM", "Stock", "Pending"}
+    assert checked == 2 * len(combined.namelist())
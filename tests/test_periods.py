@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from frame_store import FrameStore
+from validation import period_coverage, validate_periods
+
+START, END = date(2026, 9, 1), date(2026, 9, 30)
+
+def windows(start, end, days):
+    # the (start, end) windows validate_periods builds
+    periods = []
+    while start <= end:
+        period_end = min(start + timedelta(days=days - 1), end)
+        periods.append((start, period_end))
+        start = period_end + timedelta(days=1)
+    return periods
+
+def naive_coverage(dates, periods):
+    days = [d.date() for d in pd.to_datetime(pd.Series(dates), errors="coerce").dropna()]
+    return np.array([any(s <= d <= e for d in days) for s, e in periods], dtype=bool)
+
+@pytest.mark.parametrize("days", [1, 7, 30, 365])
+def test_period_coverage_matches_a_scan_of_every_window(days):
+    periods = windows(START, END, days)
+    rng = np.random.default_rng(days)
+    dates = list(pd.Timestamp(START) + pd.to_timedelta(rng.integers(-5, 36, 40), unit="D"))
+    dates += [pd.Timestamp("2026-09-14 23:59:59"), pd.NaT, "not a date"]
+    assert period_coverage(pd.Series(dates, dtype=object), periods).tolist() == \
+        naive_coverage(dates, periods).tolist()
+
+def test_period_coverage_boundaries():
+    periods = windows(START, END, 7)  # Sep 1-7, 8-14, 15-21, 22-28, 29-30
+    # first and last day of a window, a time late on a window's last day
+    days = [pd.Timestamp("2026-09-07"), pd.Timestamp("2026-09-08"), pd.Timestamp("2026-09-21 23:59")]
+    covered = period_coverage(pd.Series(days), periods)
+    assert covered.tolist() == [True, True, True, False, False]
+    # the days just outside the range cover nothing, the range's own ends do
+    outside = pd.Series(pd.to_datetime(["2026-08-31", "2026-10-01"]))
+    assert not period_coverage(outside, periods).any()
+    ends = pd.Series(pd.to_datetime(["2026-09-01", "2026-09-30"]))
+    assert period_coverage(ends, periods).tolist() == [True, False, False, False, True]
+
+def test_period_coverage_without_dates_or_windows():
+    periods = windows(START, END, 7)
+    assert not period_coverage(pd.Series([], dtype="datetime64[ns]"), periods).any()
+    assert not period_coverage(pd.Series([pd.NaT, None]), periods).any()
+    assert period_coverage(pd.Series(pd.to_datetime(["2026-09-02"])), []).size == 0
+
+def location_frames(location_path, dates, tl_dates=None):
+    # frames as the store hands them out: named and typed (schemas.py)
+    def frame(column, values):
+        return [("file.xlsx", pd.DataFrame({column: pd.to_datetime(values)}))]
+    frames = {
+        (location_path, "bo list"): frame("PO DATE", dates),
+        (location_path, "receiving pending detail"): frame("ORDER DATE", dates),
+        (location_path, "receiving today detail"): frame("ORDER DATE", dates),
+        (location_path, "transfer list"): frame("REQ.DATE", dates if tl_dates is None else tl_dates),
+    }
+    return frames
+
+def location_store(location_path, dates, tl_dates=None):
+    return FrameStore(location_frames(location_path, dates, tl_dates), index={location_path: {}})
+
+def test_validate_periods_reports_gaps_per_window_and_file():
+    loc = "/upload/HYUNDAI/DLR/LOC"
+    every_week = ["2026-09-01", "2026-09-14", "2026-09-15", "2026-09-28", "2026-09-30"]
+    # week 2 (Sep 8-14) only has its last day; the Transfer List misses the last, 2-day window
+    store = location_store(loc, every_week, tl_dates=every_week[:-1])
+    errors, log = validate_periods([("HYUNDAI", "DLR", "LOC", loc)], START, END, 7, store)
+    assert log["Period"].tolist() == ["2026-09-29 to 2026-09-30"]
+    assert log["Missing In"].tolist() == ["Transfer list"]
+    assert errors == ["LOC: Transfer list missing for period 2026-09-29 to 2026-09-30"]
+
+def test_validate_periods_gap_in_every_file():
+    loc = "/upload/HYUNDAI/DLR/LOC"
+    store = location_store(loc, ["2026-09-01", "2026-09-07", "2026-09-22"])
+    errors, log = validate_periods([("HYUNDAI", "DLR", "LOC", loc)], START, END, 7, store)
+    assert log["Period"].tolist() == ["2026-09-08 to 2026-09-14", "2026-09-15 to 2026-09-21",
+                                      "2026-09-29 to 2026-09-30"]
+    assert set(log["Missing In"]) == {"OEM, Receiving Pending Detail, Receiving Today Detail, Transfer list"}
+    assert len(errors) == 3
+
+def test_validate_periods_skips_a_location_missing_a_core_file():
+    loc = "/upload/HYUNDAI/DLR/LOC"
+    frames = {**location_frames(loc, []), (loc, "transfer list"): []}
+    store = FrameStore(frames, index={loc: {}})
+    errors, log = validate_periods([("HYUNDAI", "DLR", "LOC", loc)], START, END, 7, store)
+    assert errors == [] and log.empty
@@ -0,0 +1,73 @@
+import io
+import html
+import pandas as pd
+import pytest
+from frame_store import frame_column, read_column, read_file, sniff_format
+
+QTY = [5, 2.5, None, "7", 1234, 0, 3]
+
+def sheet_rows(blank_rows):
+    # a title row, `blank_rows` empty rows, the header row, then data with a blank row in it
+    rows = [["RECEIVING PENDING DETAIL", None, None]] + [[None, None, None]] * blank_rows
+    rows.append(["PART NO", "ACCEPT QTY", "LOC"])
+    for i, q in enumerate(QTY):
+        rows.append([f"P{i}", q, "R1"])
+    rows.insert(len(rows) - 2, [None, None, None])
+    return rows
+
+def xlsx_bytes(rows):
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    for r, row in enumerate(rows, start=1):
+        for c, v in enumerate(row, start=1):
+            if v is not None:  # blank cells and rows are not written at all, as DMS exports do
+                ws.cell(row=r, column=c, value=v)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+def xls_bytes(rows):
+    xlwt = pytest.importorskip("xlwt")
+    wb = xlwt.Workbook()
+    ws = wb.add_sheet("Sheet1")
+    for r, row in enumerate(rows):
+        for c, v in enumerate(row):
+            if v is not None:
+                ws.write(r, c, v)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+def html_bytes(rows):
+    def cell(v):
+        if isinstance(v, int) and v >= 1000:
+            v = f"{v:,}"  # thousands separators, as the HTML exports print them
+        return f"<td>{'' if v is None else html.escape(str(v))}</td>"
+    body = "".join("<tr>" + "".join(cell(v) for v in row) + "</tr>" for row in rows)
+    return f"<html><body><table>{body}</table></body></html>".encode()
+
+WRITERS = {"xlsx": xlsx_bytes, "xls": xls_bytes, "html": html_bytes}
+
+def total(values):
+    return pd.to_numeric(values, errors="coerce").fillna(0).sum()
+
+@pytest.mark.parametrize("fmt", ["xlsx", "xls", "html"])
+@pytest.mark.parametrize("blank_rows", [0, 1, 2])
+@pytest.mark.parametrize("by", ["position", "name"])
+def test_projected_column_sums_like_the_full_parse(fmt, blank_rows, by):
+    data = WRITERS[fmt](sheet_rows(blank_rows))
+    assert sniff_format(io.BytesIO(data)) == fmt
+    header = 1 + blank_rows
+    position, names = (1, ()) if by == "position" else (None, ("QTY", "ACCEPT QTY"))
+
+    col = read_column(io.BytesIO(data), header, position, names, fmt)
+    whole = frame_column(read_file(io.BytesIO(data), header=header, fmt=fmt), position, names)
+    assert col is not None and whole is not None
+    assert total(col) == total(whole) == sum(float(q) for q in QTY if q is not None)
+
+@pytest.mark.parametrize("fmt", ["xlsx", "xls", "html"])
+def test_missing_column_is_empty(fmt):
+    data = WRITERS[fmt](sheet_rows(1))
+    col = read_column(io.BytesIO(data), 2, None, ("QUANTITY",), fmt)
+    assert col is not None and col.empty
@@ -0,0 +1,82 @@
+import io
+import pandas as pd
+import pytest
+import frame_store
+from frame_store import TEXT_SAMPLE_SIZE, read_file, read_text, sniff_format
+
+SPREADSHEET_ML = (b'<?xml version="1.0"?>\n<?mso-application progid="Excel.Sheet"?>\n'
+                  b'<Workbook xmlns="urn:schemas-microsoft-com:office:spreadsheet"><Worksheet><Table>'
+                  b'<Row><Cell><Data ss:Type="String">PART NO</Data></Cell></Row></Table></Worksheet></Workbook>')
+XHTML = (b'<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n<html><body><table>'
+         b'<tr><td>PART NO</td><td>QTY</td></tr><tr><td>P1</td><td>2</td></tr></table></body></html>')
+
+@pytest.fixture
+def engines(monkeypatch):
+    # the read_csv engines read_text tried, in order
+    calls, read_csv = [], pd.read_csv
+
+    def spy(*args, **kwargs):
+        calls.append(kwargs.get("engine"))
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(frame_store.pd, "read_csv", spy)
+    return calls
+
+@pytest.mark.parametrize("data, fmt", [
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 64, "xls"),
+    (b"PK\x03\x04" + b"\0" * 64, "xlsx"),
+    (b"<html><body><table><tr><td>1</td></tr></table></body></html>", "html"),
+    (b"\r\n\r\n  <TABLE border=1><TR><TD>1</TD></TR></TABLE>", "html"),
+    (XHTML, "html"),
+    (SPREADSHEET_ML, "xml"),
+    (b'<?xml version="1.0"?><report><row qty="1"/></report>', "xml"),
+    (b"PART NO,QTY\nP1,2\n", "text"),
+])
+def test_sniff_format(data, fmt):
+    assert sniff_format(io.BytesIO(data)) == fmt
+
+def test_xml_is_not_parsed_as_a_table():
+    assert read_file(io.BytesIO(SPREADSHEET_ML)) is None
+    assert read_file(io.BytesIO(b'<?xml version="1.0"?><report/>'), fmt="xml") is None
+
+def test_xhtml_is_read_as_html():
+    df = read_file(io.BytesIO(XHTML), header=0)
+    assert df["QTY"].tolist() == [2]
+
+@pytest.mark.parametrize("sep", [",", ";", "\t", "|"])
+def test_sniffed_delimiter_is_read_by_the_c_engine(engines, sep):
+    data = f"PART NO{sep}QTY\nP1{sep}2\nP2{sep}3\n".encode()
+    df = read_text(io.BytesIO(data), header=0)
+    assert df["QTY"].sum() == 5
+    assert engines == ["c"]
+
+def test_c_engine_failure_falls_back_to_the_python_engine(engines, monkeypatch):
+    read_csv = pd.read_csv
+
+    def c_fails(*args, **kwargs):
+        if kwargs.get("engine") == "c":
+            engines.append("c")
+            raise pd.errors.ParserError("Error tokenizing data")
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(frame_store.pd, "read_csv", c_fails)
+    df = read_text(io.BytesIO(b"PART NO;QTY\nP1;2\nP2;3\n"), header=0, text_cols=("PART NO",))
+    assert engines == ["c", "python"]
+    assert df["PART NO"].tolist() == ["P1", "P2"] and df["QTY"].sum() == 5
+
+def test_undecided_delimiter_goes_straight_to_the_python_engine(engines):
+    # ":" is not one of TEXT_DELIMITERS: the python engine sniffs the file on its own
+    df = read_text(io.BytesIO(b"PART_NO:QTY\nP1:2\nP2:3\n"), header=0)
+    assert engines == ["python"]
+    assert df["PART_NO"].tolist() == ["P1", "P2"] and df["QTY"].sum() == 5
+
+def test_non_utf8_byte_after_the_sample_rereads_as_windows_1252(engines):
+    rows = b"".join(b"P%d,1\n" % i for i in range(TEXT_SAMPLE_SIZE // 4))
+    data = b"PART NO,QTY\n" + rows + b"CAF\xc9,1\n"  # "CAFÉ" in windows-1252, far past the sample
+    df = read_text(io.BytesIO(data), header=0)
+    assert engines == ["c", "c"]
+    assert df["PART NO"].iloc[-1] == "CAFÉ" and df["QTY"].sum() == len(df)
+
+def test_rows_with_too_many_fields_are_skipped():
+    df = read_text(io.BytesIO(b"PART NO,QTY\nP1,2\nP2,3,extra\nP3,4\n"), header=0)
+    assert df["PART NO"].tolist() == ["P1", "P3"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from frame_store import FrameStore
+from hrpt import build_location_reports
+
+BLANK_EVERY = 5  # a blank PART NO ? every 5 rows, so most chunk sizes below see chunks with and without one
+CHUNK_SIZES = (1, 2, 3, 4, 7, 100000)
+
+class ChunkedStore(FrameStore):
+    """FrameStore reading Stock files chunk_rows rows at a time."""
+
+    def __init__(self, chunk_rows):
+        super().__init__()
+        self.chunk_rows = chunk_rows
+
+    def reduce(self, location_path, kind, fn, chunk_rows=None):
+        return super().reduce(location_path, kind, fn, self.chunk_rows)
+
+def stock_export(rows=40):
+    part_no = np.arange(100000, 100000 + rows).astype(object)
+    part_no[::BLANK_EVERY] = None
+    part_type = np.array(["X", "Y", "A", "Z"] * (rows // 4), dtype=object)
+    part_type[3::9] = 1  # numeric PART TYPE cells
+    df = pd.DataFrame({"PART NO ?": part_no, "PART TYPE": part_type, "ON-HAND": np.arange(rows) % 7,
+                       "LOCATION": "R01"})
+    df.loc[len(df) // 2] = None  # a fully blank row in the middle of the sheet
+    return df
+
+def stock_output(location_path, store, categories):
+    previews, _, errors = build_location_reports("Hyundai", "Dealer", "Loc", location_path, categories, store,
+                                                 output_format="csv.gz")
+    assert not errors
+    return previews["Stock_Hyundai_Dealer_Loc.csv.gz"].reset_index(drop=True)
+
+@pytest.mark.parametrize("ext", ["xlsx", "csv"])
+@pytest.mark.parametrize("categories", [["Spares"], ["Accessories"], ["Spares", "Accessories"]])
+def test_stock_output_does_not_depend_on_chunk_size(tmp_path, ext, categories):
+    df = stock_export()
+    path = tmp_path / f"Stock 1.{ext}"
+    if ext == "xlsx":
+        df.to_excel(path, index=False)
+    else:
+        df.astype({"PART NO ?": "Int64"}).to_csv(path, index=False)
+
+    whole = FrameStore()
+    whole.frames(str(tmp_path), "stock")  # parsed in one piece; reduce then passes the frame whole
+    expected = stock_output(str(tmp_path), whole, categories)
+    assert not expected.empty
+    # part numbers are read as text: 100001 stays "100001" even though the column has blanks
+    assert "100001" in expected["Partnumber"].tolist() or "100002" in expected["Partnumber"].tolist()
+    assert not expected["Partnumber"].str.len().gt(6).any()
+
+    for chunk_rows in CHUNK_SIZES:
+        out = stock_output(str(tmp_path), ChunkedStore(chunk_rows), categories)
+        pd.testing.assert_frame_equal(out, expected, obj=f"Stock output with chunk_rows={chunk_rows}")
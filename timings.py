@@ -0,0 +1,79 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# ---------------- Stage Timings ---------------- #
+# Where a run's time goes: one record per parsed file and per location stage.
+#   parse / parse (cached) / read column  one input file (format, engine, rows read)
+#   validate_cross_sums / validate_periods  one location; includes the parses they trigger
+#   reports                                one location's report computation (and the parses
+#                                          it triggers), excl. Excel
+#   excel                                  one output file serialized (per location or dealer;
+#                                          workbook, Parquet or csv.gz)
+TIMING_COLUMNS = ["stage", "location", "file", "format", "engine", "rows", "seconds"]
+
+# engine read_file uses per sniffed format
+PARSE_ENGINES = {"xlsx": "openpyxl", "xls": "xlrd", "html": "read_html", "text": "read_csv"}
+
+# location stages do not overlap; the parse stages happen inside them
+LOCATION_STAGES = ("validate_cross_sums", "validate_periods", "reports", "excel")
+
+def location_label(location_path):
+    """Brand/dealer/location label of an extracted folder or an in-ZIP location path."""
+    return "/".join([p for p in re.split(r"[\\/]", location_path) if p][-3:])
+
+class StageTimings:
+    """Timing records of one run; filled from threads and merged from worker processes."""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, location=None, file=None, fmt=None, rows=None, engine=None):
+        record = {"stage": stage, "location": location, "file": file, "format": fmt,
+                  "engine": engine if engine is not None else PARSE_ENGINES.get(fmt),
+                  "rows": rows, "seconds": seconds}
+        with self._lock:
+            self.records.append(record)
+
+    @contextmanager
+    def time(self, stage, location=None, file=None):
+        """Time a block; the yielded dict can carry rows/fmt/engine set inside it."""
+        extra = {}
+        t0 = time.perf_counter()
+        try:
+            yield extra
+        finally:
+            self.add(stage, time.perf_counter() - t0, location, file, **extra)
+
+    def extend(self, records):
+        with self._lock:
+            self.records.extend(records)
+
+    def frame(self):
+        return timings_frame(self.records)
+
+def timings_frame(records):
+    """DataFrame of timing records, with rows_per_s where rows are known."""
+    df = pd.DataFrame(records, columns=TIMING_COLUMNS)
+    df["seconds"] = df["seconds"].astype(float).round(4)
+    df["rows"] = df["rows"].astype(float)
+    df["rows_per_s"] = (df["rows"] / df["seconds"].where(df["seconds"] > 0)).round(0)
+    return df
+
+def stage_summary(df):
+    """Per stage: count, total/max seconds, rows and throughput."""
+    by_stage = df.groupby("stage", sort=False)
+    summary = by_stage.agg(count=("seconds", "size"), seconds=("seconds", "sum"), max_seconds=("seconds", "max"))
+    summary["rows"] = by_stage["rows"].sum(min_count=1)
+    summary["rows_per_s"] = (summary["rows"] / summary["seconds"].where(summary["seconds"] > 0)).round(0)
+    return summary.round(3).sort_values("seconds", ascending=False).reset_index()
+
+def location_summary(df):
+    """Per location: seconds per stage, total over LOCATION_STAGES, slowest first."""
+    by_location = df.dropna(subset=["location"]).pivot_table(index="location", columns="stage",
+                                                             values="seconds", aggfunc="sum", fill_value=0.0)
+    by_location["total"] = by_location[[c for c in LOCATION_STAGES if c in by_location.columns]].sum(axis=1)
+    return by_location.round(3).sort_values("total", ascending=False).reset_index().rename_axis(columns=None)
@@ -0,0 +1,251 @@
+import os
+import zipfile
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from frame_store import FrameStore, DirectorySource, ZipSource
+from schemas import TD_QTY_CANDIDATES
+from timings import location_label
+
+# Validators and upload helpers shared by the Streamlit app (Hyundaiapp.py) and
+# the headless batch CLI (hyundai_cli.py); nothing here renders UI.
+
+# ---------------- Period Mapping ---------------- #
+PERIOD_TYPES = {"Day": 1, "Week": 7, "Month": 30, "Quarter": 90, "Year": 365}
+
+# ---------------- Validation Functions (periods) ---------------- #
+def period_coverage(dates, periods):
+    """
+    Boolean array, one entry per (start, end) window: True if any date falls in it.
+    Windows are contiguous and sorted, so every date is bucketed with a single
+    searchsorted pass instead of one Python scan per window.
+    """
+    covered = np.zeros(len(periods), dtype=bool)
+    days = pd.to_datetime(dates, errors='coerce').dropna().to_numpy(dtype='datetime64[D]')
+    if not periods or days.size == 0:
+        return covered
+    starts = np.array([p[0] for p in periods], dtype='datetime64[D]')
+    last_end = np.datetime64(periods[-1][1], 'D')
+    days = days[(days >= starts[0]) & (days <= last_end)]
+    covered[np.searchsorted(starts, days, side='right') - 1] = True
+    return covered
+
+def validate_periods(all_locations, start_date, end_date, period_days, store=None):
+    store = store if store is not None else FrameStore()
+    validation_errors = []
+    missing_periods_log = []
+
+    # Build (start,end) windows
+    periods = []
+    current_date = start_date
+    while current_date <= end_date:
+        period_end = min(current_date + timedelta(days=period_days - 1), end_date)
+        periods.append((current_date, period_end))
+        current_date = period_end + timedelta(days=1)
+
+    for brand, dealer, location, location_path in all_locations:
+        with store.timings.time("validate_periods", location_label(location_path)):
+            # parsed once per upload; "receving" typo handled by the store
+            oem_files = store.frames(location_path, 'bo list')
+            rpd_files = store.frames(location_path, 'receiving pending detail')
+            rtd_files = store.frames(location_path, 'receiving today detail')
+            tl_files  = store.frames(location_path, 'transfer list')
+
+            # If any of the core files is completely absent, skip period checks for this location
+            if not oem_files or not rpd_files or not rtd_files or not tl_files:
+                continue
+
+            # frames come typed from the store (schemas.py): the date columns are datetime64
+            def coverage(files, column, what):
+                has_period = np.zeros(len(periods), dtype=bool)
+                for _, df in files:
+                    try:
+                        if df is None or df.empty or column not in df.columns:
+                            continue
+                        has_period |= period_coverage(df[column], periods)
+                    except Exception as e:
+                        validation_errors.append(f"{location}: Error validating {what} periods - {str(e)}")
+                return has_period
+
+            oem_has_period = coverage(oem_files, 'PO DATE', "OEM")
+            receiving_has_period = coverage(rpd_files, 'ORDER DATE', "receiving")
+            rtd_has_period = coverage(rtd_files, 'ORDER DATE', "receiving today")
+            tl_has_period = coverage(tl_files, 'REQ.DATE', "Transfer list")
+
+            # MRN not in Hyundai set; mark True
+            mrn_has_period = np.ones(len(periods), dtype=bool)
+
+            for k, (period_start, period_end) in enumerate(periods):
+                missing_in = []
+                if not oem_has_period[k]: missing_in.append("OEM")
+                if not mrn_has_period[k]: missing_in.append("MRN")
+                if not receiving_has_period[k]: missing_in.append("Receiving Pending Detail")
+                if not rtd_has_period[k]: missing_in.append("Receiving Today Detail")
+                if not tl_has_period[k]: missing_in.append("Transfer list")
+
+                if missing_in:
+                    missing_periods_log.append({
+                        'Brand': brand, 'Dealer': dealer, 'Location': location,
+                        'Period': f"{period_start} to {period_end}",
+                        'Missing In': ", ".join(missing_in)
+                    })
+                    validation_errors.append(f"{location}: {' and '.join(missing_in)} missing for period {period_start} to {period_end}")
+
+    validation_log_df = pd.DataFrame(missing_periods_log) if missing_periods_log else pd.DataFrame(
+        columns=['Brand', 'Dealer', 'Location', 'Period', 'Missing In']
+    )
+    return validation_errors, validation_log_df
+
+# ---------------- HARD BLOCK: cross-sum checks ---------------- #
+def _to_num(s):
+    return pd.to_numeric(s, errors="coerce").fillna(0.0)
+
+def validate_cross_sums(all_locations, store=None):
+    """
+    1) Sum(ACCEPT) in Receiving Pending List == Sum(ACCEPT QTY) in Receiving Pending Detail
+    2) Sum(ACCEPT) in Receiving Today List   == Sum(ACCEPT QTY) in Receiving Today Detail
+    3) Sum(SEND)   in Transfer List          == Sum(QUANTITY) in Transfer Detail
+    If any mismatch -> return blocking errors.
+    Only the summed column of each file is read (FrameStore.column), unless the
+    store already holds the parsed frame.
+    """
+    store = store if store is not None else FrameStore()
+    errors = []
+    rows = []
+
+    # only the summed column of each file is read (names from the schemas in schemas.py);
+    # Transfer Detail is less standardized: the first quantity header present is used
+    RPL_ACCEPT = ('SHIPPED INFORMATION_ACCEPT QTY',)
+    RPD_ACCEPT = ('ACCEPT QTY',)
+    TL_SEND = ('QUANTITY_SEND',)
+
+    def total(columns):
+        return sum((_to_num(col).sum() for _, col in columns if col is not None and not col.empty), 0.0)
+
+    for brand, dealer, location, location_path in all_locations:
+        with store.timings.time("validate_cross_sums", location_label(location_path)):
+            # ----- 1) Receiving Pending List vs Detail -----
+            rpl_files = store.column(location_path, 'receiving pending list', RPL_ACCEPT)
+            rpd_files = store.column(location_path, 'receiving pending detail', RPD_ACCEPT)
+            rpl_accept = total(rpl_files)
+            rpd_accept = total(rpd_files)
+
+            if (rpl_files or rpd_files) and abs(rpl_accept - rpd_accept) > 1e-6:
+                errors.append(f"{location}: Receiving Pending List ACCEPT({rpl_accept:.2f}) != Pending Detail ACCEPT QTY({rpd_accept:.2f})")
+                rows.append({"Brand":brand,"Dealer":dealer,"Location":location,"Check":"Receiving Pending (List vs Detail)",
+                            "List_Sum":rpl_accept,"Detail_Sum":rpd_accept,"Difference":rpl_accept - rpd_accept})
+
+            # ----- 2) Receiving Today List vs Detail -----
+            rtl_files = store.column(location_path, 'receiving today list', RPL_ACCEPT)
+            rtd_files = store.column(location_path, 'receiving today detail', RPD_ACCEPT)
+            rtl_accept = total(rtl_files)
+            rtd_accept = total(rtd_files)
+
+            if (rtl_files or rtd_files) and abs(rtl_accept - rtd_accept) > 1e-6:
+                errors.append(f"{location}: Receiving Today List ACCEPT({rtl_accept:.2f}) != Today Detail ACCEPT QTY({rtd_accept:.2f})")
+                rows.append({"Brand":brand,"Dealer":dealer,"Location":location,"Check":"Receiving Today (List vs Detail)",
+                            "List_Sum":rtl_accept,"Detail_Sum":rtd_accept,"Difference":rtl_accept - rtd_accept})
+
+            # ----- 3) Transfer List vs Transfer Detail -----
+            tl_files = store.column(location_path, 'transfer list', TL_SEND)
+            td_files = store.column(location_path, 'transfer detail', TD_QTY_CANDIDATES)
+            tl_send = total(tl_files)
+            td_qty = total(td_files)
+
+            if (tl_files or td_files) and abs(tl_send - td_qty) > 1e-6:
+                errors.append(f"{location}: Transfer List SEND({tl_send:.2f}) != Transfer Detail QUANTITY({td_qty:.2f})")
+                rows.append({"Brand":brand,"Dealer":dealer,"Location":location,"Check":"Transfer (List vs Detail)",
+                            "List_Sum":tl_send,"Detail_Sum":td_qty,"Difference":tl_send - td_qty})
+
+    log_df = pd.DataFrame(rows, columns=["Brand","Dealer","Location","Check","List_Sum","Detail_Sum","Difference"])
+    return errors, log_df
+
+# ---------------- Optional: external checks kept lenient ---------------- #
+def validate_oem_mrn_po_codes(all_locations):
+    """
+    Safe/lenient for Hyundai: no check is run, three empty dataframes are returned. The
+    published PO-code sheet maps to no Hyundai report, so it is not downloaded.
+    """
+    # Not used as a blocker here
+    return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+# ---------------- Upload Helpers ---------------- #
+def list_locations(root):
+    """[(brand, dealer, location, location_path)] for every brand/dealer/location folder under root."""
+    all_locations = []
+    for brand in os.listdir(root):
+        brand_path = os.path.join(root, brand)
+        if not os.path.isdir(brand_path): continue
+        for dealer in os.listdir(brand_path):
+            dealer_path = os.path.join(brand_path, dealer)
+            if not os.path.isdir(dealer_path): continue
+            for location in os.listdir(dealer_path):
+                location_path = os.path.join(dealer_path, location)
+                if os.path.isdir(location_path):
+                    all_locations.append((brand, dealer, location, location_path))
+    return all_locations
+
+def extract_upload(uploaded_file, temp_dir):
+    """Extract the uploaded ZIP under temp_dir and list its brand/dealer/location folders."""
+    extract_path = os.path.join(temp_dir, "extracted_files")
+    os.makedirs(extract_path, exist_ok=True)
+    with zipfile.ZipFile(uploaded_file, 'r') as zip_ref:
+        zip_ref.extractall(extract_path)
+    return extract_path, list_locations(extract_path)
+
+def load_upload(uploaded_file, stream_zip, workers=1):
+    """
+    Open an uploaded ZIP (path or binary file object) as a report source. Returns (source, all_locations, temp_dir).
+    stream_zip reads members straight from the archive; otherwise it is extracted to disk.
+    """
+    temp_dir = tempfile.mkdtemp()
+    if not stream_zip:
+        _, all_locations = extract_upload(uploaded_file, temp_dir)
+        return DirectorySource(), all_locations, temp_dir
+    if workers > 1:
+        # worker processes re-open the archive by path: spool the (still compressed) upload once
+        zip_path = os.path.join(temp_dir, "upload.zip")
+        uploaded_file.seek(0)
+        with open(zip_path, "wb") as out:
+            shutil.copyfileobj(uploaded_file, out)
+        source = ZipSource(zip_path)
+    else:
+        source = ZipSource(uploaded_file)
+    return source, source.locations, temp_dir
+
+def check_presence(all_locations, store):
+    """File presence checks: one message per missing report kind per location."""
+    required = ['bo list', 'receiving pending list', 'receiving pending detail', 'stock',
+                'receiving today list', 'receiving today detail', 'transfer list', 'transfer detail']
+    missing_files = []
+    for brand, dealer, location, location_path in all_locations:
+        # the store's per-location index comes from one directory scan and is reused by every stage
+        index = store.index(location_path)
+        for k in required:
+            if not index[k]:
+                missing_files.append(f"{brand}/{dealer}/{location} - Missing: {k}")
+    return missing_files
+
+# ---------------- Full Validation Pass ---------------- #
+def validate_upload(all_locations, start_date, end_date, period_days, store):
+    """
+    Presence, cross-sum and period checks of one upload, as stored in the result cache.
+    The cross-sums run first: on a hard block processing is halted anyway, so the
+    period checks (full parses) are skipped and their results left empty.
+    """
+    missing_files = check_presence(all_locations, store)
+    # HARD BLOCK: cross-sum validations
+    qty_mismatch_errors, qty_mismatch_log = validate_cross_sums(all_locations, store)
+    if qty_mismatch_errors:
+        period_validation_errors, validation_log = validate_periods([], start_date, end_date, period_days, store)
+    else:
+        period_validation_errors, validation_log = validate_periods(all_locations, start_date, end_date, period_days, store)
+    return {
+        "missing_files": missing_files,
+        "period_validation_errors": period_validation_errors,
+        "validation_log": validation_log,
+        "qty_mismatch_errors": qty_mismatch_errors,
+        "qty_mismatch_log": qty_mismatch_log,
+    }
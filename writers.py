@@ -0,0 +1,168 @@
+import io
+import os
+import pandas as pd
+
+try:
+    import xlsxwriter
+except ImportError:  # optional: constant-memory backend
+    xlsxwriter = None
+
+try:
+    import pyarrow
+except ImportError:  # optional: Parquet output
+    pyarrow = None
+
+# ---------------- Writer Backends ---------------- #
+# "openpyxl"            full in-memory workbook via pd.ExcelWriter (previous behaviour, default)
+# "openpyxl-write-only" openpyxl streaming worksheets, rows appended chunk by chunk
+# "xlsxwriter"          xlsxwriter constant_memory mode (needs the optional xlsxwriter package)
+# The streaming backends are opt-in: same cell values, but plain header cells (no bold/border)
+WRITER_BACKENDS = ("openpyxl", "openpyxl-write-only", "xlsxwriter")
+DEFAULT_BACKEND = os.environ.get("HYUNDAI_XLSX_BACKEND", "openpyxl")
+
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"  # what pd.ExcelWriter uses for datetime cells
+ROW_CHUNK = 10000
+
+def available_backends():
+    return [b for b in WRITER_BACKENDS if b != "xlsxwriter" or xlsxwriter is not None]
+
+def _row_chunks(df):
+    # rows as python values (NaN/NaT -> None), converted ROW_CHUNK rows at a time
+    for start in range(0, len(df), ROW_CHUNK):
+        chunk = df.iloc[start:start + ROW_CHUNK]
+        yield chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+
+def _datetime_cols(df):
+    return [i for i, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)]
+
+def _write_openpyxl(sheets, buf):
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        for sheet_name, df in sheets:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+        writer.book.active = 0
+
+def _write_openpyxl_write_only(sheets, buf):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    for sheet_name, df in sheets:
+        ws = wb.create_sheet(title=sheet_name)
+        ws.append([str(c) for c in df.columns])
+        dt_cols = _datetime_cols(df)
+        for rows in _row_chunks(df):
+            for row in rows:
+                if dt_cols:
+                    row = list(row)
+                    for i in dt_cols:
+                        if row[i] is not None:
+                            row[i] = WriteOnlyCell(ws, value=row[i].to_pydatetime())
+                            row[i].number_format = DATETIME_FORMAT
+                ws.append(row)
+    wb.active = 0
+    wb.save(buf)
+
+def _write_xlsxwriter(sheets, buf):
+    if xlsxwriter is None:
+        raise ValueError("xlsx backend 'xlsxwriter' needs the xlsxwriter package")
+    wb = xlsxwriter.Workbook(buf, {"constant_memory": True, "nan_inf_to_errors": True,
+                                   "strings_to_urls": False})
+    dt_format = wb.add_format({"num_format": DATETIME_FORMAT})
+    for sheet_name, df in sheets:
+        ws = wb.add_worksheet(sheet_name)
+        ws.write_row(0, 0, [str(c) for c in df.columns])
+        dt_cols = _datetime_cols(df)
+        r = 1
+        for rows in _row_chunks(df):
+            for row in rows:
+                ws.write_row(r, 0, row)
+                for i in dt_cols:
+                    if row[i] is not None:
+                        ws.write_datetime(r, i, row[i].to_pydatetime(), dt_format)
+                r += 1
+    wb.worksheets()[0].activate()
+    wb.close()
+
+_WRITERS = {
+    "openpyxl": _write_openpyxl,
+    "openpyxl-write-only": _write_openpyxl_write_only,
+    "xlsxwriter": _write_xlsxwriter,
+}
+
+def write_workbook(sheets, backend=None):
+    """
+    Serialize [(sheet_name, df), ...] to xlsx bytes, index-free, first sheet active.
+    backend: one of WRITER_BACKENDS (default DEFAULT_BACKEND / $HYUNDAI_XLSX_BACKEND).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in _WRITERS:
+        raise ValueError(f"Unknown xlsx backend {backend!r}; choose from {', '.join(WRITER_BACKENDS)}")
+    buf = io.BytesIO()
+    _WRITERS[backend](sheets, buf)
+    return buf.getvalue()
+
+# ---------------- Output Formats ---------------- #
+# "xlsx"     workbooks as above (previous behaviour)
+# "parquet"  one Parquet file per frame (needs the optional pyarrow package)
+# "csv.gz"   one gzip-compressed CSV per frame
+# Programmatic consumers can skip Excel on both sides; a workbook's extra sheet (the OEM
+# "Check Order status" summary) becomes a file of its own in the non-xlsx formats.
+OUTPUT_FORMATS = ("xlsx", "parquet", "csv.gz")
+DEFAULT_FORMAT = os.environ.get("HYUNDAI_OUTPUT_FORMAT", "xlsx")
+MIME_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "csv.gz": "application/gzip",
+}
+
+def available_formats():
+    return [f for f in OUTPUT_FORMATS if f != "parquet" or pyarrow is not None]
+
+def file_format(file_name):
+    """Output format of a file name, from its extension; None if it is not an output format."""
+    name = file_name.lower()
+    return next((fmt for fmt in OUTPUT_FORMATS if name.endswith("." + fmt)), None)
+
+def output_stem(file_name):
+    """File name without its output format extension."""
+    fmt = file_format(file_name)
+    return file_name[:-len(fmt) - 1] if fmt else file_name
+
+def _parquet_frame(df):
+    # Parquet needs one type per column: object columns mixing numbers and text (e.g. order
+    # numbers from different DMS exports) are written as text, missing values kept
+    out = df
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("mixed", "mixed-integer"):
+            if out is df:
+                out = df.copy(deep=False)
+            out[col] = values.where(values.isna(), values.astype(str))
+    return out
+
+def write_frame(df, fmt):
+    """Serialize one frame to "parquet" or "csv.gz" bytes, index-free."""
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        if pyarrow is None:
+            raise ValueError("output format 'parquet' needs the pyarrow package")
+        _parquet_frame(df).to_parquet(buf, index=False, engine="pyarrow")
+    elif fmt == "csv.gz":
+        # fixed gzip timestamp: the same frame always gives the same bytes
+        df.to_csv(buf, index=False, compression={"method": "gzip", "mtime": 0})
+    else:
+        raise ValueError(f"Unknown output format {fmt!r}; choose from {', '.join(OUTPUT_FORMATS)}")
+    return buf.getvalue()
+
+def write_output(sheets, fmt=None, backend=None):
+    """
+    Serialize [(sheet_name, df), ...] in an output format (default DEFAULT_FORMAT /
+    $HYUNDAI_OUTPUT_FORMAT): an xlsx workbook written by `backend`, otherwise a single
+    frame, so exactly one sheet.
+    """
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt == "xlsx":
+        return write_workbook(sheets, backend)
+    if len(sheets) != 1:
+        raise ValueError(f"output format {fmt!r} holds one frame, got {len(sheets)} sheets")
+    return write_frame(sheets[0][1], fmt)